@@ -6,15 +6,39 @@ Updated to follow ADK best practices with enhanced error handling.
 
 import os
 import sys
+import time
+import asyncio
 import argparse
 import logging
-from typing import Optional
-from my_agent.agent import create_agent_from_config, create_agent_with_validation, NL2SQLRedshiftAgent
-from my_agent.demo_queries import run_quick_demo, DemoQueryRunner
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Deque, Dict, Optional, Tuple
 
+# The agent modules pull in google.adk and Vertex AI; they are imported only
+# once an action needs them so that --help stays fast.
+if TYPE_CHECKING:
+    from my_agent.agent import NL2SQLRedshiftAgent
 
-def main():
-    """Main entry point with enhanced error handling and validation."""
+from my_agent.serialization import fast_dumps, fast_loads
+
+# A passing validation is remembered for a few minutes so that repeated
+# --query / --quick-demo invocations don't redo the same checks
+VALIDATION_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "nl2sql-agent", "validation.json")
+VALIDATION_CACHE_TTL_SECONDS = 300
+
+# The schema, relationships and business rules are defined in these modules, so
+# editing one must not reuse a validation done against the old version
+_SCHEMA_SOURCES = tuple(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "my_agent", name)
+    for name in ("tools.py", "sql_helper.py")
+)
+
+
+@lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser (once per process)."""
 
     parser = argparse.ArgumentParser(
         description="NL2SQL Redshift ADK Agent - Revolve E-commerce Data Analysis",
@@ -49,9 +73,17 @@ Business Context:
     # Configuration arguments
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
     parser.add_argument("--no-validation", action="store_true", help="Skip setup validation")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response cache")
     parser.add_argument("--interactive", action="store_true", help="Interactive query mode")
+    parser.add_argument("--fail-fast", action="store_true", help="Stop the --demo suite after the first failed query")
+
+    return parser
+
+
+def main():
+    """Main entry point with enhanced error handling and validation."""
 
-    args = parser.parse_args()
+    args = _build_parser().parse_args()
 
     # Configure logging
     logging.basicConfig(
@@ -66,6 +98,8 @@ Business Context:
         print("🚀 Initializing NL2SQL Redshift Agent for Revolve E-commerce Analysis...")
         logger.info("Starting NL2SQL Redshift Agent")
     
+        from my_agent.agent import create_agent_from_config, create_agent_with_validation
+
         # Create agent with enhanced configuration handling
         if args.project_id and args.connection and not args.no_validation:
             # Create agent directly with validation for production use
@@ -74,17 +108,18 @@ Business Context:
                 connection=args.connection,
                 location=args.location or "us-central1",
                 model=args.model or "gemini-2.0-flash",
-                debug=args.debug
+                debug=args.debug,
+                enable_cache=not args.no_cache
             )
         else:
             # Create agent from config file
-            agent = create_agent_from_config(args.config, debug=args.debug)
+            agent = create_agent_from_config(args.config, debug=args.debug, enable_cache=not args.no_cache)
 
             # Override config with command line arguments if provided
             if args.project_id:
-                logger.info(f"Overriding project_id with: {args.project_id}")
+                logger.info("Overriding project_id with: %s", args.project_id)
             if args.connection:
-                logger.info(f"Overriding connection with: {args.connection}")
+                logger.info("Overriding connection with: %s", args.connection)
 
         print(f"✅ Agent initialized for project: {agent.project_id}")
         print(f"🔗 Using connection: {agent.connection}")
@@ -92,7 +127,7 @@ Business Context:
         print(f"🧠 Model: {agent.model}")
 
     except Exception as e:
-        logger.error(f"Agent initialization failed: {e}")
+        logger.error("Agent initialization failed: %s", e)
         print(f"❌ Failed to initialize agent: {e}")
         print("\n💡 Troubleshooting tips:")
         print("  - Verify your GCP_PROJECT_ID environment variable")
@@ -100,11 +135,21 @@ Business Context:
         print("  - Ensure service account has required IAM roles")
         print("  - Use --debug for detailed error information")
         return 1
-    
+
+    # Every action below reuses the single agent created above
+    try:
         # Validate setup if requested or not skipped
         if args.validate or not args.no_validation:
-            print("\n🔍 Validating agent setup...")
-            validation = agent.validate_setup()
+            # Explicit --validate always runs a real check
+            validation = None if args.validate else _load_cached_validation(agent)
+
+            if validation is not None:
+                print("\n🔍 Using recent validation result (run with --validate to re-check)")
+            else:
+                print("\n🔍 Validating agent setup...")
+                validation = agent.validate_setup()
+                if validation["overall_status"]:
+                    _store_cached_validation(agent, validation)
 
             _print_validation_results(validation)
 
@@ -117,14 +162,16 @@ Business Context:
         # Run demos
         if args.quick_demo:
             print("\n🚀 Running Quick Demo - Core Revolve Business Queries...")
+            from my_agent.demo_queries import run_quick_demo
             run_quick_demo(agent)
             return 0
 
         if args.demo:
             print("\n🚀 Running Full Demo Suite - All Revolve Business Scenarios...")
+            from my_agent.demo_queries import DemoQueryRunner
             demo_runner = DemoQueryRunner(agent)
-            results = demo_runner.run_all_demos()
-            return 0 if all(r["success"] for r in results) else 1
+            asyncio.run(demo_runner.arun_all_demos(fail_fast=args.fail_fast))
+            return 0 if demo_runner.success else 1
 
         # Run single query
         if args.query:
@@ -147,12 +194,81 @@ Business Context:
         logger.info("Agent interrupted by user")
         return 0
     except Exception as e:
-        logger.error(f"Unexpected error: {e}", exc_info=True)
+        logger.error("Unexpected error: %s", e, exc_info=True)
         print(f"\n❌ Unexpected error: {e}")
         print("Use --debug for detailed error information")
         return 1
 
 
+def _schema_signature() -> str:
+    """Modification times and sizes of the schema sources; only stats, no schema is built."""
+
+    parts = []
+    for path in _SCHEMA_SOURCES:
+        try:
+            st = os.stat(path)
+        except OSError:
+            parts.append("missing")
+        else:
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+    return ",".join(parts)
+
+
+def _validation_fingerprint(agent: "NL2SQLRedshiftAgent") -> Dict[str, str]:
+    """Settings a cached validation result must match to be reused."""
+
+    return {
+        "project_id": agent.project_id,
+        "connection": agent.connection,
+        "location": agent.location,
+        "model": agent.model,
+        "service_account_path": agent.service_account_path,
+        "schema_sources": _schema_signature()
+    }
+
+
+def _load_cached_validation(agent: "NL2SQLRedshiftAgent") -> Optional[Dict[str, Any]]:
+    """Return the last successful validation if it is recent and for the same setup."""
+
+    try:
+        with open(VALIDATION_CACHE_PATH, "rb") as f:
+            cached = fast_loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(cached, dict) or cached.get("fingerprint") != _validation_fingerprint(agent):
+        return None
+    if time.time() - cached.get("ts", 0) > VALIDATION_CACHE_TTL_SECONDS:
+        return None
+
+    return cached.get("validation")
+
+
+def _store_cached_validation(agent: "NL2SQLRedshiftAgent", validation: Dict[str, Any]) -> None:
+    """Persist a successful validation; failures to write are ignored."""
+
+    cache_dir = os.path.dirname(VALIDATION_CACHE_PATH)
+    payload = {
+        "fingerprint": _validation_fingerprint(agent),
+        "ts": time.time(),
+        "validation": validation
+    }
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a unique temp file and rename so concurrent runs never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(fast_dumps(payload, default=str))
+            os.replace(tmp_path, VALIDATION_CACHE_PATH)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logging.getLogger(__name__).debug("Could not write validation cache: %s", e)
+
+
 def _print_validation_results(validation: dict) -> None:
     """Print validation results in a user-friendly format."""
 
@@ -177,10 +293,15 @@ def _print_validation_results(validation: dict) -> None:
                 print(f"   {key}: {value}")
 
 
-def _process_single_query(agent: NL2SQLRedshiftAgent, query: str) -> bool:
+def _process_single_query(agent: "NL2SQLRedshiftAgent", query: str) -> bool:
     """Process a single query and display results."""
 
     result = agent.process_question(query)
+    return _print_query_result(result)
+
+
+def _print_query_result(result: dict) -> bool:
+    """Display the outcome of a processed query; returns whether it succeeded."""
 
     if result.get("success"):
         print("✅ Query executed successfully!")
@@ -212,7 +333,7 @@ def _process_single_query(agent: NL2SQLRedshiftAgent, query: str) -> bool:
         return False
 
 
-def _run_interactive_mode(agent: NL2SQLRedshiftAgent) -> int:
+def _run_interactive_mode(agent: "NL2SQLRedshiftAgent") -> int:
     """Run the agent in interactive mode."""
 
     print("\n🎯 Interactive Mode - Revolve E-commerce Data Analysis")
@@ -224,10 +345,16 @@ def _run_interactive_mode(agent: NL2SQLRedshiftAgent) -> int:
     print("  - 'How many orders were shipped via UPS?'")
     print("\nType 'exit', 'quit', or Ctrl+C to stop.")
     print("Type 'demo' to see example questions.")
+    print("Questions run in the background - keep typing; press Enter to show finished results.")
     print("=" * 60)
 
+    # One worker keeps answers in order while the user drafts the next question
+    executor = ThreadPoolExecutor(max_workers=1)
+    pending: Deque[Tuple[str, Future]] = deque()
+
     try:
         while True:
+            _print_finished_queries(pending)
             query = input("\n🤔 Your question: ").strip()
 
             if not query:
@@ -243,15 +370,28 @@ def _run_interactive_mode(agent: NL2SQLRedshiftAgent) -> int:
                     print(f"  {i}. {q}")
                 continue
 
-            print(f"\n🔄 Processing: {query}...")
-            success = _process_single_query(agent, query)
+            pending.append((query, executor.submit(agent.process_question, query)))
+            print(f"🔄 Processing in background: {query}")
+
+        _print_finished_queries(pending, wait=True)
 
     except KeyboardInterrupt:
         pass
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
     print("\n👋 Exiting interactive mode")
     return 0
 
 
+def _print_finished_queries(pending: Deque[Tuple[str, Future]], wait: bool = False) -> None:
+    """Print results of completed background queries in submission order."""
+
+    while pending and (wait or pending[0][1].done()):
+        query, future = pending.popleft()
+        print(f"\n📬 Result for: {query}")
+        _print_query_result(future.result())
+
+
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
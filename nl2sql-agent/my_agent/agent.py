@@ -3,13 +3,176 @@ Main ADK Agent for NL2SQL Redshift integration.
 Updated to follow ADK best practices and handle client's business requirements.
 """
 
-from google.adk.agents import Agent
-from .tools import create_redshift_tool, create_schema_tool
-from .sql_helper import RedshiftSQLHelper
 import os
+import re
+import copy
 import json
+import asyncio
+import hashlib
+import itertools
 import logging
-from typing import Dict, Optional, Any
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, Iterable, Optional, Any
+
+from .cache import (EmbeddingModelUnavailable, ExactResponseCache, PersistentResponseCache, QuestionEmbedder,
+                    SemanticResponseCache, canonicalize_question, normalize_question)
+from .serialization import fast_loads
+
+# google.adk and the tool/schema modules are imported where they are first
+# needed, so config validation and metadata lookups don't pay for them.
+if TYPE_CHECKING:
+    from google.adk.agents import Agent
+
+
+# Lifetime of the Vertex AI context cache holding the static instructions,
+# and how close to expiry it may get before being extended.
+CONTEXT_CACHE_TTL = timedelta(hours=1)
+CONTEXT_CACHE_REFRESH_MARGIN = timedelta(minutes=5)
+
+# Context caches shared by every agent in the process, keyed by
+# (project_id, location, model, instructions hash), so agents with the same
+# prompt don't each create and pay storage for their own copy.
+_CONTEXT_CACHES: dict[tuple[str, str, str, str], Any] = {}
+_CONTEXT_CACHE_LOCK = threading.Lock()
+
+# Config file checks
+_REQUIRED_CONFIG_FIELDS = ("project_id",)
+_VALID_LOCATIONS = frozenset({"us-central1", "us-east1", "us-west1", "europe-west1", "asia-northeast1"})
+
+# Keyword groups used by the question checks, combined so one scan of the
+# lowercased question finds every group present. They match substrings so
+# plurals ("brands") still count.
+_QUESTION_KEYWORDS_RE = re.compile(
+    r"(?P<business>revolve|forward)"
+    r"|(?P<product>product|brand|category)"
+    r"|(?P<payment>payment|applepay|token)"
+    r"|(?P<lost>lost|package)"
+)
+
+# Response patterns for the compliance check; case-insensitive so the
+# (possibly long) response text never needs a lowercased copy
+_SITE_COLUMN_RE = re.compile(r"site", re.IGNORECASE)
+_SITE_FILTER_RE = re.compile(r"site\s*(?:<>|!=)\s*'f'", re.IGNORECASE)
+_LOST_STATUS_RE = re.compile(r"'lost'", re.IGNORECASE)
+_LOST_PACKAGE_STATUS_RE = re.compile(r"'lost\s+package'", re.IGNORECASE)
+
+# validate_setup check flags; the agent and tools checks gate the rest
+_AGENT_OK = 1
+_TOOLS_OK = 2
+_SCHEMA_OK = 4
+_SAMPLES_OK = 8
+_RULES_OK = 16
+_AUTH_OK = 32
+_CORE_CHECKS = _AGENT_OK | _TOOLS_OK
+_ALL_CHECKS = _CORE_CHECKS | _SCHEMA_OK | _SAMPLES_OK | _RULES_OK | _AUTH_OK
+
+# Follow-ups answered in the background after a successful question when
+# prefetching is enabled; the answers land in the response cache.
+_FOLLOW_UP_TEMPLATES = (
+    "{question} Break the results down by category.",
+    "{question} Compare with the same period last month.",
+)
+
+# Prompt used to answer several independent questions in one agent turn
+_BATCH_PROMPT_TEMPLATE = """
+Answer each of the following {count} independent questions. For each one, generate
+the Redshift SQL following the business rules, execute it, and summarize the result.
+
+Return ONLY a JSON array with exactly {count} objects, in the same order as the questions,
+each of the form {{"question": "...", "sql": "...", "executed": true, "answer": "..."}}.
+Set "executed" to false and leave "answer" empty for any query that was not run or failed.
+
+Questions:
+{questions}
+"""
+
+
+# Static parts of the agent's system instructions; the schema, relationships
+# and business rules are joined in between by _build_instructions.
+_INSTRUCTIONS_HEADER = """
+You are an expert SQL analyst specializing in Revolve's e-commerce data analysis on AWS Redshift.
+
+Your primary mission is to:
+1. Convert natural language questions to CORRECT Redshift SQL queries following Revolve's business rules
+2. Execute queries using Integration Connector tools
+3. Provide clear, actionable business insights based on the results
+
+<Critical Business Rules - MUST FOLLOW>
+"""
+
+_INSTRUCTIONS_SCHEMA_HEADING = "\n\n<Database Schema - Revolve E-commerce>\n"
+
+_INSTRUCTIONS_RELATIONSHIPS_HEADING = "\n\n<Table Relationships>\n"
+
+# Filled with the row cap from tools.MAX_RESULT_ROWS
+_INSTRUCTIONS_FOOTER_TEMPLATE = """
+
+<Key Guidelines>
+- ALWAYS use fully qualified table names (bi_report.ordernumber_rs, mars__revolveclothing_com___db.orders, etc.)
+- ALWAYS apply business rules (e.g., site <> 'F' for Revolve orders)
+- Use proper Redshift SQL syntax and data types
+- For product analysis, use bi_report.shipmentnumber_rs (has product info), NOT ordernumber_rs
+- For date queries, use proper TIMESTAMP comparisons with >= and < operators
+- When showing "top N" results, always include ORDER BY and LIMIT
+- Never return more than {max_result_rows} rows: queries without a LIMIT, or with a larger one, are capped at {max_result_rows}
+- For aggregations, include all non-aggregated columns in GROUP BY
+- Provide both the SQL query and natural language explanation of results
+- If a query fails, analyze the error and suggest corrections
+
+<Available Tools>
+- redshift_execute_custom_query: Execute custom SQL queries (USE THIS for complex analytical queries)
+- redshift_list_[table]: List records from specific tables (for simple data browsing)
+- redshift_get_[table]: Get specific records with filters (for targeted lookups)
+
+<Response Format>
+When answering questions:
+1. First, analyze what data is needed and which business rules apply
+2. Determine the correct tables to use (ordernumber_rs vs shipmentnumber_rs)
+3. Generate SQL query following business rules
+4. Execute the query using redshift_execute_custom_query
+5. Interpret results in Revolve's business context
+6. Provide actionable insights and recommendations
+
+<Common Query Patterns for Revolve>
+- Revolve Orders: SELECT ... FROM bi_report.ordernumber_rs WHERE site <> 'F'
+- Product Analysis: SELECT ... FROM bi_report.shipmentnumber_rs sn JOIN mars__revolveclothing_com___db.product p ON sn.productcode = UPPER(TRIM(p.code))
+- Category Analysis: Include mars__id.id_categorynames2 with SUBSTRING(SPLIT_PART(p.code, '-', 2), 2, 1) = cn.lettercat
+- Payment Analysis: Join with mars__revolveclothing_com___db.orders for paymenttokenservice
+- High Value Customers: WHERE metric >= (SELECT PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY metric) ...)
+- Random Sampling: Use RANDOM() function with ORDER BY
+
+<Error Handling>
+- If a query fails, check business rule compliance first
+- Verify table names are fully qualified
+- Ensure proper JOINs and field mappings
+- Double-check date formats and filtering logic
+
+Always prioritize business rule compliance and provide insights that help Revolve make data-driven decisions.
+"""
+
+
+@lru_cache(maxsize=4)
+def _build_instructions(schema_description: str, relationships: str, business_rules: str) -> str:
+    """
+    Assemble the agent's system instructions.
+
+    The inputs are static for a given schema, so repeated agent creation
+    reuses the assembled prompt.
+    """
+    from .tools import MAX_RESULT_ROWS
+
+    return "".join((
+        _INSTRUCTIONS_HEADER,
+        business_rules,
+        _INSTRUCTIONS_SCHEMA_HEADING,
+        schema_description,
+        _INSTRUCTIONS_RELATIONSHIPS_HEADING,
+        relationships,
+        _INSTRUCTIONS_FOOTER_TEMPLATE.format(max_result_rows=MAX_RESULT_ROWS)
+    ))
 
 
 class NL2SQLRedshiftAgent:
@@ -24,7 +187,13 @@ class NL2SQLRedshiftAgent:
                  connection: str = "redshift-demo-connection",
                  model: str = "gemini-2.0-flash",
                  service_account_path: Optional[str] = None,
-                 debug: bool = False):
+                 debug: bool = False,
+                 context_cache: bool = False,
+                 enable_cache: bool = True,
+                 prefetch_follow_ups: bool = False,
+                 cache_path: Optional[str] = None,
+                 compact_schema: bool = False,
+                 semantic_cache: bool = False):
 
         # Configure logging
         if debug:
@@ -40,11 +209,25 @@ class NL2SQLRedshiftAgent:
         self.connection = connection
         self.model = model
         self.service_account_path = service_account_path or "../config/service_account.json"
-
-        self.logger.info(f"Initializing NL2SQLRedshiftAgent for project: {project_id}")
+        self._context_cache_enabled = context_cache
+        self._compact_schema = compact_schema
+        self._auth_result: Optional[dict[str, Any]] = None
+        self._prefetch_lock = threading.Lock()
+        self._semantic_cache_lock = threading.Lock()
+        self._response_ids = itertools.count(1)
+        # Instances are shared across threads (see _build_agent): per-call
+        # state is thread-local and lazy setup is locked
+        self._local = threading.local()
+        self._agent_lock = threading.Lock()
+        self._agent_instance: Optional["Agent"] = None
+        self._context_cache_lock = threading.Lock()
+
+        self.logger.info("Initializing NL2SQLRedshiftAgent for project: %s", project_id)
 
         try:
             # Initialize SQL helper
+            from .sql_helper import RedshiftSQLHelper
+
             self.sql_helper = RedshiftSQLHelper()
             self.logger.info("✓ SQL helper initialized")
 
@@ -52,122 +235,220 @@ class NL2SQLRedshiftAgent:
             self.redshift_tool = self._create_tools()
             self.logger.info("✓ Redshift tools created")
 
-            # Create the ADK agent
-            self.agent = self._create_agent()
-            self.logger.info("✓ ADK agent created successfully")
+            # Response caches; keyed by instruction hash so schema or rule changes invalidate them
+            if enable_cache:
+                self.answer_cache = ExactResponseCache()
+                # Optional on-disk copy so answers survive restarts
+                self.disk_cache = self._open_disk_cache(cache_path) if cache_path else None
+            else:
+                self.answer_cache = None
+                self.disk_cache = None
+
+            # Embedding matches can pair questions that differ only in a year or
+            # a count, so the semantic layer is opt-in on top of the exact cache
+            if enable_cache and semantic_cache:
+                self._embedder = QuestionEmbedder(self.project_id, self.location)
+                self.response_cache = SemanticResponseCache()
+            else:
+                self._embedder = None
+                self.response_cache = None
+
+            # Prefetched answers are only reachable through the response cache
+            self.prefetch_follow_ups = prefetch_follow_ups and self.answer_cache is not None
 
         except Exception as e:
-            self.logger.error(f"Failed to initialize NL2SQLRedshiftAgent: {e}")
+            self.logger.error("Failed to initialize NL2SQLRedshiftAgent: %s", e)
             raise
 
-    def _create_tools(self) -> Any:
-        """Create and validate Redshift tools."""
-        try:
-            redshift_tool = create_redshift_tool(
-                project_id=self.project_id,
-                location=self.location,
-                connection=self.connection,
-                service_account_json_path=self.service_account_path
-            )
+    # The instructions, context cache and ADK agent are built on first use so
+    # that validation and metadata lookups don't pay for them.
+
+    @cached_property
+    def instructions(self) -> str:
+        """Full system instructions for the ADK agent."""
+        return self._get_agent_instructions()
+
+    @cached_property
+    def _schema_version(self) -> str:
+        """Short hash of the instructions, used to namespace cached responses."""
+        return hashlib.sha256(self.instructions.encode("utf-8")).hexdigest()[:16]
+
+    @cached_property
+    def _cached_content(self) -> Optional[Any]:
+        """Gemini context cache holding the instructions, if enabled and available."""
+        if not self._context_cache_enabled:
+            return None
+        return self._create_context_cache(self.instructions)
+
+    @cached_property
+    def agent(self) -> "Agent":
+        """The underlying ADK agent."""
+        # cached_property doesn't lock on Python 3.12+, and worker threads can
+        # ask for the agent at the same time; create it only once
+        with self._agent_lock:
+            if self._agent_instance is None:
+                try:
+                    self._agent_instance = self._create_agent(self.instructions)
+                except Exception as e:
+                    self.logger.error("Agent creation failed: %s", e)
+                    raise RuntimeError(f"Could not create ADK agent: {e}") from e
+
+                self.logger.info("✓ ADK agent created successfully")
+            return self._agent_instance
 
-            # Validate tool creation
-            if not redshift_tool:
-                raise RuntimeError("Failed to create ApplicationIntegrationToolset")
+    def _create_tools(self) -> Any:
+        """Create and validate Redshift tools; errors propagate to __init__, which logs them."""
+        from .tools import create_redshift_tool
+
+        redshift_tool = create_redshift_tool(
+            project_id=self.project_id,
+            location=self.location,
+            connection=self.connection,
+            service_account_json_path=self.service_account_path
+        )
 
-            return redshift_tool
+        # Validate tool creation
+        if not redshift_tool:
+            raise RuntimeError("Failed to create ApplicationIntegrationToolset")
 
-        except Exception as e:
-            self.logger.error(f"Tool creation failed: {e}")
-            raise RuntimeError(f"Could not create Redshift tools: {e}")
+        return redshift_tool
 
-    def _create_agent(self) -> Agent:
-        """Create ADK agent with proper configuration."""
+    def _open_disk_cache(self, cache_path: str) -> Optional[PersistentResponseCache]:
+        """Open the on-disk response cache; None (memory caches only) if the file can't be used."""
         try:
-            agent = Agent(
-                name="nl2sql-redshift-agent",
-                description="Expert NL2SQL agent for Revolve's e-commerce data analysis on AWS Redshift via GCP Integration Connectors",
-                model=self.model,
-                instructions=self._get_agent_instructions(),
-                tools=[self.redshift_tool]
-            )
+            return PersistentResponseCache(cache_path)
+        except (sqlite3.Error, OSError) as e:
+            self.logger.warning("On-disk response cache unavailable, using memory caches only: %s", e)
+            return None
 
-            return agent
+    def _create_context_cache(self, instructions: str) -> Optional[Any]:
+        """
+        Register the static instructions as a Vertex AI context cache.
 
-        except Exception as e:
-            self.logger.error(f"Agent creation failed: {e}")
-            raise RuntimeError(f"Could not create ADK agent: {e}")
-    
-    def _get_agent_instructions(self) -> str:
+        Cached input tokens are billed at a discount and are not re-processed
+        on every request. Returns None (full instructions are sent instead)
+        when caching is unavailable, e.g. the model does not support it or the
+        prompt is below the minimum cacheable size.
         """
-        Get detailed instructions for the ADK agent.
-        Updated with client's business context and requirements.
+        key = (
+            self.project_id,
+            self.location,
+            self.model,
+            hashlib.sha256(instructions.encode("utf-8")).hexdigest()
+        )
+
+        with _CONTEXT_CACHE_LOCK:
+            cached_content = _CONTEXT_CACHES.get(key)
+            if cached_content is not None:
+                self.logger.info("✓ Reusing context cache: %s", cached_content.resource_name)
+                return cached_content
+
+            try:
+                import vertexai
+                from vertexai.preview import caching
+
+                vertexai.init(project=self.project_id, location=self.location)
+                cached_content = caching.CachedContent.create(
+                    model_name=self.model,
+                    system_instruction=instructions,
+                    ttl=CONTEXT_CACHE_TTL
+                )
+                self.logger.info("✓ Context cache created: %s", cached_content.resource_name)
+
+            except Exception as e:
+                self.logger.warning("Context caching unavailable, sending full instructions: %s", e)
+                return None
+
+            _CONTEXT_CACHES[key] = cached_content
+            return cached_content
+
+    def _refresh_context_cache(self) -> None:
         """
+        Extend the context cache TTL when it is close to expiring.
 
-        schema_description = self.sql_helper._format_schema_description()
-        relationships = self.sql_helper._format_relationships()
-        business_rules = self.sql_helper._get_business_rules()
+        A cache that has already expired, or can't be extended, is dropped
+        together with the agent built on it. The next agent call then creates
+        a new context cache, or sends the full instructions if it can't.
+        """
+        cached_content = self._cached_content
+        if cached_content is None:
+            return
 
-        instructions = f"""
-You are an expert SQL analyst specializing in Revolve's e-commerce data analysis on AWS Redshift.
+        # Concurrent questions would otherwise all see the cache as expiring
+        # and extend it together
+        with self._context_cache_lock:
+            if self.__dict__.get("_cached_content") is not cached_content:
+                # Another thread already dropped it
+                return
 
-Your primary mission is to:
-1. Convert natural language questions to CORRECT Redshift SQL queries following Revolve's business rules
-2. Execute queries using Integration Connector tools
-3. Provide clear, actionable business insights based on the results
+            try:
+                remaining = cached_content.expire_time - datetime.now(timezone.utc)
+                if remaining >= CONTEXT_CACHE_REFRESH_MARGIN:
+                    return
+                if remaining > timedelta(0):
+                    cached_content.update(ttl=CONTEXT_CACHE_TTL)
+                    self.logger.debug("Context cache TTL extended")
+                    return
+                self.logger.warning("Context cache %s has expired, rebuilding the agent",
+                                    cached_content.resource_name)
+            except Exception as e:
+                self.logger.warning("Could not refresh context cache, rebuilding the agent: %s", e)
 
-<Critical Business Rules - MUST FOLLOW>
-{business_rules}
+            self._drop_context_cache(cached_content)
 
-<Database Schema - Revolve E-commerce>
-{schema_description}
+    def _drop_context_cache(self, cached_content: Any) -> None:
+        """Forget an unusable context cache and the ADK agent that references it."""
+        with _CONTEXT_CACHE_LOCK:
+            for key, shared in list(_CONTEXT_CACHES.items()):
+                if shared is cached_content:
+                    del _CONTEXT_CACHES[key]
 
-<Table Relationships>
-{relationships}
+        self.__dict__.pop("_cached_content", None)
+        with self._agent_lock:
+            self._agent_instance = None
+            self.__dict__.pop("agent", None)
 
-<Key Guidelines>
-- ALWAYS use fully qualified table names (bi_report.ordernumber_rs, mars__revolveclothing_com___db.orders, etc.)
-- ALWAYS apply business rules (e.g., site <> 'F' for Revolve orders)
-- Use proper Redshift SQL syntax and data types
-- For product analysis, use bi_report.shipmentnumber_rs (has product info), NOT ordernumber_rs
-- For date queries, use proper TIMESTAMP comparisons with >= and < operators
-- When showing "top N" results, always include ORDER BY and LIMIT
-- For aggregations, include all non-aggregated columns in GROUP BY
-- Provide both the SQL query and natural language explanation of results
-- If a query fails, analyze the error and suggest corrections
+    def _create_agent(self, instructions: str) -> "Agent":
+        """Create ADK agent with proper configuration."""
+        from google.adk.agents import Agent
+        from .tools import limit_query_rows
 
-<Available Tools>
-- redshift_execute_custom_query: Execute custom SQL queries (USE THIS for complex analytical queries)
-- redshift_list_[table]: List records from specific tables (for simple data browsing)
-- redshift_get_[table]: Get specific records with filters (for targeted lookups)
+        agent_kwargs = {}
+        if self._cached_content is not None:
+            from google.genai import types
 
-<Response Format>
-When answering questions:
-1. First, analyze what data is needed and which business rules apply
-2. Determine the correct tables to use (ordernumber_rs vs shipmentnumber_rs)
-3. Generate SQL query following business rules
-4. Execute the query using redshift_execute_custom_query
-5. Interpret results in Revolve's business context
-6. Provide actionable insights and recommendations
+            # The cached system instruction replaces the inline one
+            agent_kwargs["generate_content_config"] = types.GenerateContentConfig(
+                cached_content=self._cached_content.resource_name
+            )
+            instructions = "Follow the cached system instructions for Revolve's Redshift data analysis."
+
+        agent = Agent(
+            name="nl2sql-redshift-agent",
+            description="Expert NL2SQL agent for Revolve's e-commerce data analysis on AWS Redshift via GCP Integration Connectors",
+            model=self.model,
+            instructions=instructions,
+            tools=[self.redshift_tool],
+            # Caps custom queries at MAX_RESULT_ROWS whatever SQL the model writes
+            before_tool_callback=limit_query_rows,
+            **agent_kwargs
+        )
 
-<Common Query Patterns for Revolve>
-- Revolve Orders: SELECT ... FROM bi_report.ordernumber_rs WHERE site <> 'F'
-- Product Analysis: SELECT ... FROM bi_report.shipmentnumber_rs sn JOIN mars__revolveclothing_com___db.product p ON sn.productcode = UPPER(TRIM(p.code))
-- Category Analysis: Include mars__id.id_categorynames2 with SUBSTRING(SPLIT_PART(p.code, '-', 2), 2, 1) = cn.lettercat
-- Payment Analysis: Join with mars__revolveclothing_com___db.orders for paymenttokenservice
-- High Value Customers: Use PERCENT_RANK() OVER (ORDER BY metric DESC) <= 0.05
-- Random Sampling: Use RANDOM() function with ORDER BY
+        return agent
+    
+    def _get_agent_instructions(self) -> str:
+        """
+        Get detailed instructions for the ADK agent.
+        Updated with client's business context and requirements.
+        """
 
-<Error Handling>
-- If a query fails, check business rule compliance first
-- Verify table names are fully qualified
-- Ensure proper JOINs and field mappings
-- Double-check date formats and filtering logic
+        schema_description = self.sql_helper._format_schema_description(compact=self._compact_schema)
+        relationships = self.sql_helper._format_relationships()
+        business_rules = self.sql_helper.business_rules
 
-Always prioritize business rule compliance and provide insights that help Revolve make data-driven decisions.
-"""
-        return instructions
+        return _build_instructions(schema_description, relationships, business_rules)
     
-    def process_question(self, user_question: str, context: Optional[str] = None) -> Dict[str, Any]:
+    def process_question(self, user_question: str, context: Optional[str] = None) -> dict[str, Any]:
         """
         Process a natural language question and return SQL + results.
         Enhanced with better error handling and business rule validation.
@@ -188,35 +469,128 @@ Always prioritize business rule compliance and provide insights that help Revolv
                 "context": context
             }
 
-        self.logger.info(f"Processing question: {user_question[:100]}...")
+        self.logger.info("Processing question: %.100s...", user_question)
+
+        cached = self._get_exact_cached_result(user_question, context)
+        if cached is not None:
+            return cached
+
+        question_vector = self._embed_question(user_question)
+        cached = self._get_cached_result(question_vector, user_question, context)
+        if cached is not None:
+            return cached
+
+        result = self._answer_question(user_question, context, question_vector)
+        if result["success"] and self.prefetch_follow_ups:
+            self._speculative_prefetch(user_question, context)
+        return result
+
+    def _speculative_prefetch(self, user_question: str, context: Optional[str]) -> None:
+        """
+        Answer likely follow-up questions in the background.
+
+        Runs on a daemon thread so it never delays the caller or interpreter
+        exit; skipped if a previous prefetch is still running.
+        """
+
+        if not self._prefetch_lock.acquire(blocking=False):
+            return
+
+        def prefetch() -> None:
+            try:
+                for template in _FOLLOW_UP_TEMPLATES:
+                    follow_up = template.format(question=user_question.strip().rstrip("?."))
+                    if self._get_exact_cached_result(follow_up, context) is not None:
+                        continue
+                    question_vector = self._embed_question(follow_up)
+                    if self._get_cached_result(question_vector, follow_up, context) is None:
+                        self._answer_question(follow_up, context, question_vector)
+            except Exception as e:
+                self.logger.debug("Follow-up prefetch failed: %s", e)
+            finally:
+                self._prefetch_lock.release()
+
+        threading.Thread(target=prefetch, name="nl2sql-prefetch", daemon=True).start()
+
+    def _cache_namespace(self, context: Optional[str]) -> str:
+        """Cache partition for a context; includes the schema version so rule changes invalidate it."""
+        return f"{self._schema_version}:{context or ''}"
+
+    def _get_exact_cached_result(self, user_question: str, context: Optional[str]) -> Optional[dict[str, Any]]:
+        """Look up a previous answer to the same question, compared by its canonical form."""
+
+        if self.answer_cache is None:
+            return None
+
+        key = (self._cache_namespace(context), canonicalize_question(user_question))
+        cached = self.answer_cache.get(key)
+        if cached is None and self.disk_cache is not None:
+            try:
+                cached = self.disk_cache.get(*key)
+            except (sqlite3.Error, OSError) as e:
+                self.logger.warning("Could not read the on-disk response cache: %s", e)
+            if cached is not None:
+                self.answer_cache.put(key, cached)
+        if cached is None:
+            return None
+
+        self.logger.info("✓ Answered from response cache")
+        return {**cached, "user_question": user_question, "context": context, "cached": True}
+
+    def _get_cached_result(self, question_vector: Optional[list], user_question: str,
+                           context: Optional[str]) -> Optional[dict[str, Any]]:
+        """Look up a previous answer for an embedded question."""
+
+        if question_vector is None or self.response_cache is None:
+            return None
+
+        namespace = self._cache_namespace(context)
+        cached = self.response_cache.get(question_vector, namespace)
+        if cached is None and self.disk_cache is not None:
+            try:
+                cached = self.disk_cache.get_similar(question_vector, namespace)
+            except (sqlite3.Error, OSError) as e:
+                self.logger.warning("Could not read the on-disk response cache: %s", e)
+            if cached is not None:
+                self.response_cache.put(question_vector, namespace, cached)
+        if cached is None:
+            return None
+
+        # Let an identical repeat skip the embedding call
+        self.answer_cache.put((self._cache_namespace(context), canonicalize_question(user_question)), cached)
+
+        self.logger.info("✓ Answered from response cache")
+        return {**cached, "user_question": user_question, "context": context, "cached": True}
+
+    def _answer_question(self, user_question: str, context: Optional[str], question_vector: Optional[list],
+                         validation_result: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+        """Run the agent for a question that missed the response cache."""
 
         try:
             # Pre-validate question for business context
-            validation_result = self._pre_validate_question(user_question)
+            if validation_result is None:
+                validation_result = self._pre_validate_question(user_question)
             if not validation_result["valid"]:
-                self.logger.warning(f"Question validation failed: {validation_result['message']}")
+                self.logger.warning("Question validation failed: %s", validation_result['message'])
 
             # Use the agent to process the question
+            self._refresh_context_cache()
             response = self.agent.run(user_question)
 
-            # Post-validate response for business rules compliance
-            compliance_check = self._check_business_rule_compliance(user_question, str(response))
+            # Results (and the caches) keep only the text; the raw ADK object
+            # is available from get_last_response() in this thread
+            self._local.last_response = response
+            response_text = "".join(_iter_response_text(response))
 
-            result = {
-                "success": True,
-                "user_question": user_question,
-                "agent_response": response,
-                "context": context,
-                "validation": validation_result,
-                "compliance_check": compliance_check
-            }
+            result = self._build_result(user_question, context, response_text, validation_result)
+            self._store_result(user_question, context, question_vector, result)
 
             self.logger.info("✓ Question processed successfully")
             return result
 
         except Exception as e:
             error_msg = str(e)
-            self.logger.error(f"Error processing question: {error_msg}")
+            self.logger.error("Error processing question: %s", error_msg)
 
             return {
                 "success": False,
@@ -227,49 +601,245 @@ Always prioritize business rule compliance and provide insights that help Revolv
                 "suggestions": self._get_error_suggestions(error_msg)
             }
 
-    def _pre_validate_question(self, question: str) -> Dict[str, Any]:
-        """Validate question for common patterns and business context."""
+    def _build_result(self, user_question: str, context: Optional[str], response_text: str,
+                      validation_result: dict[str, Any]) -> dict[str, Any]:
+        """Result dictionary for an answered question, with its business rule compliance check."""
 
-        question_lower = question.lower()
-        warnings = []
-        suggestions = []
+        return {
+            "success": True,
+            "user_question": user_question,
+            "agent_response": response_text,
+            "response_id": next(self._response_ids),
+            "context": context,
+            "validation": validation_result,
+            "compliance_check": self._check_business_rule_compliance(user_question, response_text)
+        }
+
+    def _store_result(self, user_question: str, context: Optional[str], question_vector: Optional[list],
+                      result: dict[str, Any]) -> None:
+        """Write an answer to every enabled response cache."""
+
+        namespace = self._cache_namespace(context)
+        canonical = canonicalize_question(user_question)
+        if self.answer_cache is not None:
+            self.answer_cache.put((namespace, canonical), result)
+        if question_vector is not None and self.response_cache is not None:
+            self.response_cache.put(question_vector, namespace, result)
+        if self.disk_cache is not None:
+            # A failed write only costs the on-disk copy, not the answer
+            try:
+                self.disk_cache.put(namespace, canonical, question_vector, result)
+            except (sqlite3.Error, OSError) as e:
+                self.logger.warning("Could not write the on-disk response cache: %s", e)
+
+    def get_last_response(self) -> Any:
+        """
+        Return the raw ADK response from the most recent agent call made by
+        the calling thread.
 
-        # Check for business context keywords
-        if any(word in question_lower for word in ["revolve", "forward"]):
-            if "revolve" in question_lower and "site" not in question_lower:
-                suggestions.append("Consider specifying site <> 'F' to exclude Forward orders")
+        process_question results only carry the response text; use this when
+        the underlying events are needed. Each thread sees its own last
+        response, so concurrent questions on a shared agent don't overwrite
+        each other's; None if this thread hasn't called the agent yet.
+        """
+        return getattr(self._local, "last_response", None)
 
-        # Check for product-related queries
-        if any(word in question_lower for word in ["product", "brand", "category"]):
-            if "shipment" not in question_lower:
-                suggestions.append("Product analysis requires shipmentnumber_rs table for accurate results")
+    def batch_process_questions(self, questions: list[str]) -> list[dict[str, Any]]:
+        """
+        Answer several independent questions with a single agent call.
 
-        # Check for payment-related queries
-        if any(word in question_lower for word in ["payment", "applepay", "token"]):
-            suggestions.append("Payment token analysis requires joining with mars__revolveclothing_com___db.orders")
+        Questions already in the response cache are answered from it. The
+        rest go to the agent in one prompt, which returns a JSON array with
+        one {question, sql, executed, answer} object per question, amortizing
+        the per-call overhead over the batch. Answers are cached like
+        process_question's. Any question whose entry is missing, malformed or
+        not marked as executed falls back to process_question.
+
+        Args:
+            questions: Natural language questions, answered in order
+
+        Returns:
+            One result dictionary per question, shaped like process_question's
+        """
+
+        if not questions:
+            return []
+
+        results: list[Optional[dict[str, Any]]] = [None] * len(questions)
+        pending = []
+        for i, question in enumerate(questions):
+            if not question or not question.strip():
+                results[i] = self.process_question(question)
+                continue
+            results[i] = self._get_exact_cached_result(question, None)
+            if results[i] is None:
+                pending.append(i)
+
+        vectors: dict[int, Optional[list]] = {}
+        if pending and self.response_cache is not None:
+            self.warm_question_embeddings(questions[i] for i in pending)
+            for i in pending:
+                vectors[i] = self._embed_question(questions[i])
+                results[i] = self._get_cached_result(vectors[i], questions[i], None)
+            pending = [i for i in pending if results[i] is None]
+
+        if not pending:
+            return results
+
+        numbered = "\n".join(f"{n}. {questions[i]}" for n, i in enumerate(pending, 1))
+        prompt = _BATCH_PROMPT_TEMPLATE.format(count=len(pending), questions=numbered)
+        self.logger.info("Processing batch of %s questions", len(pending))
+
+        try:
+            self._refresh_context_cache()
+            response_text = "".join(_iter_response_text(self.agent.run(prompt)))
+            answers = _parse_batch_response(response_text, len(pending))
+        except Exception as e:
+            self.logger.warning("Batch request failed, answering questions individually: %s", e)
+            answers = [None] * len(pending)
+
+        for i, answer in zip(pending, answers):
+            question = questions[i]
+            if answer is None:
+                results[i] = self.process_question(question)
+                continue
+
+            response_text = f"SQL: {answer['sql']}\n{answer['answer']}"
+            result = self._build_result(question, None, response_text, self._pre_validate_question(question))
+            result["sql"] = answer["sql"]
+            self._store_result(question, None, vectors.get(i), result)
+            results[i] = result
+
+        return results
+
+    async def aprocess_question(self, user_question: str, context: Optional[str] = None) -> dict[str, Any]:
+        """
+        Async variant of process_question.
+
+        The ADK agent call is blocking, so it runs in a worker thread; this
+        lets callers overlap several questions with asyncio.gather. The
+        question checks run alongside the cache embedding round trip rather
+        than after it.
+        """
+
+        if not user_question or not user_question.strip():
+            return self.process_question(user_question, context)
+
+        self.logger.info("Processing question: %.100s...", user_question)
+
+        cached = self._get_exact_cached_result(user_question, context)
+        if cached is not None:
+            return cached
+
+        question_vector, validation_result = await asyncio.gather(
+            asyncio.to_thread(self._embed_question, user_question),
+            asyncio.to_thread(self._pre_validate_question, user_question),
+            return_exceptions=True
+        )
+        if isinstance(question_vector, BaseException):
+            question_vector = None
+        if isinstance(validation_result, BaseException):
+            validation_result = None  # re-run inside _answer_question so errors are reported
+
+        cached = self._get_cached_result(question_vector, user_question, context)
+        if cached is not None:
+            return cached
+
+        return await asyncio.to_thread(
+            self._answer_question, user_question, context, question_vector, validation_result
+        )
+
+    async def process_questions(self, questions: list[str], context: Optional[str] = None,
+                                max_concurrency: int = 8) -> list[dict[str, Any]]:
+        """
+        Answer several questions concurrently.
+
+        Questions that are identical apart from case and spacing are only
+        sent to the agent once.
+
+        Args:
+            questions: Natural language questions
+            context: Optional additional context applied to every question
+            max_concurrency: Maximum agent calls in flight (respect Gemini QPS limits)
+
+        Returns:
+            One result dictionary per question, in input order
+        """
+
+        unique: dict[str, str] = {}
+        for question in questions:
+            unique.setdefault(normalize_question(question or ""), question)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(question: str) -> dict[str, Any]:
+            async with semaphore:
+                return await self.aprocess_question(question, context)
+
+        answers = await asyncio.gather(*(run(q) for q in unique.values()))
+        by_key = dict(zip(unique, answers))
+
+        return [
+            {**by_key[normalize_question(question or "")], "user_question": question}
+            for question in questions
+        ]
+
+    def warm_question_embeddings(self, questions: Iterable[str]) -> None:
+        """
+        Embed questions ahead of time in one batched request, so later
+        response-cache lookups for them skip the embedding call.
+
+        Args:
+            questions: Questions that are about to be asked
+        """
+
+        if self.response_cache is None:
+            return
+
+        try:
+            self._embedder.embed(list(questions))
+        except EmbeddingModelUnavailable as e:
+            self._disable_semantic_cache(e)
+        except Exception as e:
+            self.logger.warning("Question embedding failed, skipping warm-up: %s", e)
+
+    def _embed_question(self, question: str) -> Optional[list]:
+        """Embed a question for cache lookup; None if caching is off or unavailable."""
+
+        if self.response_cache is None:
+            return None
+
+        try:
+            return self._embedder.embed([question])[0]
+        except EmbeddingModelUnavailable as e:
+            self._disable_semantic_cache(e)
+        except Exception as e:
+            self.logger.warning("Question embedding failed, skipping response cache: %s", e)
+        return None
+
+    def _disable_semantic_cache(self, error: Exception) -> None:
+        """Turn off embedding lookups for the rest of the process after the model failed to load."""
+
+        with self._semantic_cache_lock:
+            if self.response_cache is None:
+                return
+            self.response_cache = None
+        self.logger.warning("Embedding model unavailable, semantic response cache disabled: %s", error)
+
+    def _pre_validate_question(self, question: str) -> dict[str, Any]:
+        """Validate question for common patterns and business context."""
 
         return {
             "valid": True,
-            "warnings": warnings,
-            "suggestions": suggestions,
+            "warnings": [],
+            "suggestions": list(_pre_validation_suggestions(question.lower())),
             "message": "Pre-validation completed"
         }
 
-    def _check_business_rule_compliance(self, question: str, response: str) -> Dict[str, Any]:
+    def _check_business_rule_compliance(self, question: str, response: str) -> dict[str, Any]:
         """Check if the response follows business rules."""
 
-        violations = []
-        question_lower = question.lower()
-        response_lower = response.lower()
-
-        # Check common business rule compliance
-        if "revolve" in question_lower and "site" in response_lower:
-            if "site <> 'f'" not in response_lower and "site != 'f'" not in response_lower:
-                violations.append("Missing Revolve filter: should use site <> 'F'")
-
-        if any(word in question_lower for word in ["lost", "package"]):
-            if "'lost'" in response_lower and "'lost package'" not in response_lower:
-                violations.append("Should use 'lost package' not 'lost' for package status")
+        violations = list(_business_rule_violations(question.lower(), response))
 
         return {
             "compliant": len(violations) == 0,
@@ -277,7 +847,7 @@ Always prioritize business rule compliance and provide insights that help Revolv
             "checked_rules": ["revolve_filter", "lost_package_status"]
         }
 
-    def _get_error_suggestions(self, error_msg: str) -> List[str]:
+    def _get_error_suggestions(self, error_msg: str) -> list[str]:
         """Provide suggestions based on error message."""
 
         suggestions = []
@@ -301,125 +871,140 @@ Always prioritize business rule compliance and provide insights that help Revolv
 
         return suggestions
     
-    def validate_setup(self) -> Dict[str, Any]:
+    def validate_setup(self) -> dict[str, Any]:
         """
         Validate that the agent setup is working correctly.
         Enhanced with comprehensive checks following ADK best practices.
         """
 
-        validation_results = {
-            "agent_initialized": False,
-            "tools_available": False,
-            "schema_loaded": False,
-            "sample_queries_loaded": False,
-            "business_rules_loaded": False,
-            "authentication_configured": False,
-            "integration_connector_accessible": False,
-            "errors": [],
-            "warnings": [],
-            "configuration": {}
-        }
+        errors = []
+        warnings = []
+        status = 0
 
         self.logger.info("Starting comprehensive setup validation...")
 
         try:
-            # Check agent initialization
-            if self.agent:
-                validation_results["agent_initialized"] = True
+            # Check agent initialization without forcing it; a deferred agent
+            # is created on the first question
+            if "agent" not in self.__dict__:
+                status |= _AGENT_OK
+                self.logger.info("✓ Agent will be created on first question")
+            elif self.agent:
+                status |= _AGENT_OK
                 self.logger.info("✓ Agent initialized")
             else:
-                validation_results["errors"].append("ADK Agent not initialized")
+                errors.append("ADK Agent not initialized")
 
             # Check tools
             if self.redshift_tool:
-                validation_results["tools_available"] = True
+                status |= _TOOLS_OK
                 self.logger.info("✓ Redshift tools available")
             else:
-                validation_results["errors"].append("ApplicationIntegrationToolset not available")
-
-            # Check schema
-            if self.sql_helper.schema_info and self.sql_helper.schema_info.get("tables"):
-                validation_results["schema_loaded"] = True
-                table_count = len(self.sql_helper.schema_info["tables"])
-                self.logger.info(f"✓ Schema loaded with {table_count} tables")
-            else:
-                validation_results["errors"].append("Database schema not loaded")
-
-            # Check sample queries
-            if self.sql_helper.sample_queries:
-                validation_results["sample_queries_loaded"] = True
-                query_count = len(self.sql_helper.sample_queries)
-                self.logger.info(f"✓ Sample queries loaded ({query_count} queries)")
-            else:
-                validation_results["errors"].append("Sample queries not loaded")
+                errors.append("ApplicationIntegrationToolset not available")
+
+            # Without the agent and its tools the remaining checks can't make the setup usable
+            if status & _CORE_CHECKS == _CORE_CHECKS:
+                # Check schema
+                if self.sql_helper.schema_info and self.sql_helper.schema_info.get("tables"):
+                    status |= _SCHEMA_OK
+                    table_count = len(self.sql_helper.schema_info["tables"])
+                    self.logger.info("✓ Schema loaded with %s tables", table_count)
+                else:
+                    errors.append("Database schema not loaded")
 
-            # Check business rules
-            try:
-                business_rules = self.sql_helper._get_business_rules()
-                if business_rules and len(business_rules) > 100:  # Should have substantial rules
-                    validation_results["business_rules_loaded"] = True
-                    self.logger.info("✓ Business rules loaded")
+                # Check sample queries
+                if self.sql_helper.sample_queries:
+                    status |= _SAMPLES_OK
+                    query_count = len(self.sql_helper.sample_queries)
+                    self.logger.info("✓ Sample queries loaded (%s queries)", query_count)
                 else:
-                    validation_results["warnings"].append("Business rules may be incomplete")
-            except Exception as e:
-                validation_results["errors"].append(f"Business rules validation failed: {e}")
+                    errors.append("Sample queries not loaded")
+
+                # Check business rules
+                try:
+                    business_rules = self.sql_helper.business_rules
+                    if business_rules and len(business_rules) > 100:  # Should have substantial rules
+                        status |= _RULES_OK
+                        self.logger.info("✓ Business rules loaded")
+                    else:
+                        warnings.append("Business rules may be incomplete")
+                except Exception as e:
+                    errors.append(f"Business rules validation failed: {e}")
+
+                # Check authentication
+                auth_configured = self._validate_authentication()
+                if auth_configured["valid"]:
+                    status |= _AUTH_OK
+                    self.logger.info("✓ Authentication configured")
+                else:
+                    errors.extend(auth_configured["errors"])
 
-            # Check authentication
-            auth_configured = self._validate_authentication()
-            validation_results["authentication_configured"] = auth_configured["valid"]
-            if auth_configured["valid"]:
-                self.logger.info("✓ Authentication configured")
-            else:
-                validation_results["errors"].extend(auth_configured["errors"])
+        except Exception as e:
+            error_msg = f"Validation error: {str(e)}"
+            errors.append(error_msg)
+            self.logger.error(error_msg)
 
-            # Store configuration details
-            validation_results["configuration"] = {
+        validation_results = {
+            "agent_initialized": bool(status & _AGENT_OK),
+            "tools_available": bool(status & _TOOLS_OK),
+            "schema_loaded": bool(status & _SCHEMA_OK),
+            "sample_queries_loaded": bool(status & _SAMPLES_OK),
+            "business_rules_loaded": bool(status & _RULES_OK),
+            "authentication_configured": bool(status & _AUTH_OK),
+            "integration_connector_accessible": False,
+            "errors": errors,
+            "warnings": warnings,
+            "configuration": {
                 "project_id": self.project_id,
                 "location": self.location,
                 "connection": self.connection,
                 "model": self.model,
                 "service_account_path": self.service_account_path
-            }
-
-        except Exception as e:
-            error_msg = f"Validation error: {str(e)}"
-            validation_results["errors"].append(error_msg)
-            self.logger.error(error_msg)
-
-        # Calculate overall status
-        validation_results["overall_status"] = all([
-            validation_results["agent_initialized"],
-            validation_results["tools_available"],
-            validation_results["schema_loaded"],
-            validation_results["sample_queries_loaded"],
-            validation_results["business_rules_loaded"],
-            validation_results["authentication_configured"]
-        ]) and len(validation_results["errors"]) == 0
+            },
+            "overall_status": status == _ALL_CHECKS and not errors
+        }
 
         # Log validation summary
         if validation_results["overall_status"]:
             self.logger.info("✅ All validation checks passed")
         else:
-            self.logger.warning(f"❌ Validation failed with {len(validation_results['errors'])} errors")
+            self.logger.warning("❌ Validation failed with %s errors", len(errors))
 
         return validation_results
 
-    def _validate_authentication(self) -> Dict[str, Any]:
-        """Validate authentication configuration."""
+    def _validate_authentication(self) -> dict[str, Any]:
+        """
+        Validate authentication configuration.
+
+        A successful result is remembered for the life of the agent, since
+        credential locations don't change while it runs; failures are checked
+        again on the next call.
+        """
+
+        if self._auth_result is not None:
+            return self._auth_result
+
+        auth_result = self._check_authentication()
+        if auth_result["valid"]:
+            self._auth_result = auth_result
+        return auth_result
+
+    def _check_authentication(self) -> dict[str, Any]:
+        """Look for usable credentials on the filesystem."""
 
         auth_result = {"valid": False, "errors": [], "method": "unknown"}
 
         try:
             # Check for service account file
-            if os.path.exists(self.service_account_path):
+            if os.path.isfile(self.service_account_path):
                 auth_result["method"] = "service_account_file"
                 auth_result["valid"] = True
                 return auth_result
 
             # Check for environment credentials
-            if os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
-                creds_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-                if os.path.exists(creds_path):
+            creds_path = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
+            if creds_path:
+                if os.path.isfile(creds_path):
                     auth_result["method"] = "environment_credentials"
                     auth_result["valid"] = True
                     return auth_result
@@ -459,14 +1044,163 @@ Always prioritize business rule compliance and provide insights that help Revolv
         return self.sql_helper.schema_info
 
 
+def _iter_response_text(response: Any) -> Iterable[str]:
+    """
+    Yield text from an agent response.
+
+    Streaming responses are iterables of ADK events (text lives in
+    event.content.parts); anything else is treated as a single chunk.
+    """
+    if isinstance(response, (str, bytes, dict)) or not hasattr(response, "__iter__"):
+        yield str(response)
+        return
+
+    for event in response:
+        content = getattr(event, "content", None)
+        if content is not None and getattr(content, "parts", None):
+            text = "".join(part.text for part in content.parts if getattr(part, "text", None))
+        else:
+            text = str(event)
+        if text:
+            yield text
+
+
+# The validators depend only on their text inputs, so repeated questions
+# (demos, retries) reuse earlier results. They return tuples so cached
+# values can't be mutated by callers.
+
+@lru_cache(maxsize=256)
+def _pre_validation_suggestions(question_lower: str) -> tuple[str, ...]:
+    """Suggestions for a lowercased question, based on business context keywords."""
+
+    keyword_groups = _question_keyword_groups(question_lower)
+    suggestions = []
+
+    # Check for business context keywords
+    if "business" in keyword_groups:
+        if "revolve" in question_lower and "site" not in question_lower:
+            suggestions.append("Consider specifying site <> 'F' to exclude Forward orders")
+
+    # Check for product-related queries
+    if "product" in keyword_groups:
+        if "shipment" not in question_lower:
+            suggestions.append("Product analysis requires shipmentnumber_rs table for accurate results")
+
+    # Check for payment-related queries
+    if "payment" in keyword_groups:
+        suggestions.append("Payment token analysis requires joining with mars__revolveclothing_com___db.orders")
+
+    return tuple(suggestions)
+
+
+@lru_cache(maxsize=256)
+def _business_rule_violations(question_lower: str, response: str) -> tuple[str, ...]:
+    """Business rule violations in an agent response to a lowercased question."""
+
+    violations = []
+
+    # Check common business rule compliance
+    if "revolve" in question_lower and _SITE_COLUMN_RE.search(response):
+        if not _SITE_FILTER_RE.search(response):
+            violations.append("Missing Revolve filter: should use site <> 'F'")
+
+    if "lost" in _question_keyword_groups(question_lower):
+        if _LOST_STATUS_RE.search(response) and not _LOST_PACKAGE_STATUS_RE.search(response):
+            violations.append("Should use 'lost package' not 'lost' for package status")
+
+    return tuple(violations)
+
+
+def _question_keyword_groups(question_lower: str) -> set:
+    """Names of the keyword groups that occur in a lowercased question."""
+    return {match.lastgroup for match in _QUESTION_KEYWORDS_RE.finditer(question_lower)}
+
+
+def _parse_batch_response(text: str, expected: int) -> list[Optional[dict[str, Any]]]:
+    """
+    Extract the per-question objects from a batched agent answer.
+
+    Returns ``expected`` entries. Positions that could not be parsed, or
+    whose query was not reported as executed with both SQL and an answer,
+    are None.
+    """
+    start, end = text.find("["), text.rfind("]")
+    answers: list[Optional[dict[str, Any]]] = [None] * expected
+    if start == -1 or end <= start:
+        return answers
+
+    try:
+        parsed = fast_loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return answers
+
+    if isinstance(parsed, list):
+        for i, item in enumerate(parsed[:expected]):
+            if (isinstance(item, dict) and item.get("executed") is True
+                    and item.get("sql") and item.get("answer")):
+                answers[i] = item
+
+    return answers
+
+
+@lru_cache(maxsize=8)
+def _build_agent(project_id: str,
+                 location: str,
+                 connection: str,
+                 model: str,
+                 service_account_path: Optional[str],
+                 debug: bool,
+                 context_cache: bool,
+                 enable_cache: bool,
+                 config_digest: Optional[str],
+                 prefetch_follow_ups: bool = False,
+                 cache_path: Optional[str] = None,
+                 compact_schema: bool = False,
+                 semantic_cache: bool = False) -> NL2SQLRedshiftAgent:
+    """
+    Build an agent once per distinct configuration.
+
+    Repeat calls with the same settings return the same instance, so its
+    toolset and underlying connections are reused instead of rebuilt.
+    ``config_digest`` is the SHA-256 of the config file contents and only
+    serves as part of the cache key.
+
+    The shared instance may be used from several threads at once (demo
+    workers, asyncio.to_thread calls, follow-up prefetch). The agent keeps
+    get_last_response() per thread and locks its lazy agent creation and
+    context cache refresh.
+    """
+    return NL2SQLRedshiftAgent(
+        project_id=project_id,
+        location=location,
+        connection=connection,
+        model=model,
+        service_account_path=service_account_path,
+        debug=debug,
+        context_cache=context_cache,
+        enable_cache=enable_cache,
+        prefetch_follow_ups=prefetch_follow_ups,
+        cache_path=cache_path,
+        compact_schema=compact_schema,
+        semantic_cache=semantic_cache
+    )
+
+
+def clear_agent_cache() -> None:
+    """Drop all cached agent instances (mainly useful for tests)."""
+    _build_agent.cache_clear()
+
+
 def create_agent_from_config(config_path: str = "../config/agent_config.json",
-                            debug: bool = False) -> NL2SQLRedshiftAgent:
+                            debug: bool = False,
+                            enable_cache: bool = True) -> NL2SQLRedshiftAgent:
     """
     Create agent instance from configuration file following ADK best practices.
 
     Args:
         config_path: Path to configuration JSON file
         debug: Enable debug logging
+        enable_cache: Reuse answers to repeated questions
 
     Returns:
         Configured NL2SQLRedshiftAgent instance
@@ -481,16 +1215,21 @@ def create_agent_from_config(config_path: str = "../config/agent_config.json",
     if debug:
         logging.basicConfig(level=logging.DEBUG)
 
-    logger.info(f"Loading agent configuration from {config_path}")
+    logger.info("Loading agent configuration from %s", config_path)
 
     # Default configuration with enhanced validation
     default_config = {
-        "project_id": os.getenv("GCP_PROJECT_ID"),
+        "project_id": os.environ.get("GCP_PROJECT_ID"),
         "location": "us-central1",
         "connection": "redshift-demo-connection",
         "model": "gemini-2.0-flash",
         "service_account_path": "../config/service_account.json",
-        "debug": debug
+        "debug": debug,
+        "context_cache": False,
+        "prefetch_follow_ups": False,
+        "cache_path": None,
+        "compact_schema": False,
+        "semantic_cache": False
     }
 
     # Validate environment variables
@@ -499,25 +1238,31 @@ def create_agent_from_config(config_path: str = "../config/agent_config.json",
 
     # Try to load configuration file with better error handling
     config_loaded = False
-    if os.path.exists(config_path):
+    config_digest = None
+    try:
+        config_stat = os.stat(config_path)
+    except OSError:
+        config_stat = None
+
+    if config_stat is not None:
         try:
-            with open(config_path, 'r') as f:
-                file_config = json.load(f)
+            config_digest, file_config = _load_config(config_path, config_stat.st_mtime_ns, config_stat.st_size)
+            file_config = copy.deepcopy(file_config)
 
             # Validate configuration structure
             _validate_config_structure(file_config)
 
             default_config.update(file_config)
             config_loaded = True
-            logger.info(f"✓ Configuration loaded from {config_path}")
+            logger.info("✓ Configuration loaded from %s", config_path)
 
         except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in config file {config_path}: {e}")
+            raise ValueError(f"Invalid JSON in config file {config_path}: {e}") from e
         except Exception as e:
-            logger.error(f"Error loading config file {config_path}: {e}")
+            logger.error("Error loading config file %s: %s", config_path, e)
             logger.info("Falling back to default configuration")
     else:
-        logger.warning(f"Config file {config_path} not found, using default configuration")
+        logger.warning("Config file %s not found, using default configuration", config_path)
 
     # Final validation of required parameters
     if not default_config["project_id"]:
@@ -527,31 +1272,54 @@ def create_agent_from_config(config_path: str = "../config/agent_config.json",
         raise ValueError("connection name is required in configuration")
 
     logger.info("Configuration validation completed:")
-    logger.info(f"  Project ID: {default_config['project_id']}")
-    logger.info(f"  Location: {default_config['location']}")
-    logger.info(f"  Connection: {default_config['connection']}")
-    logger.info(f"  Model: {default_config['model']}")
+    logger.info("  Project ID: %s", default_config['project_id'])
+    logger.info("  Location: %s", default_config['location'])
+    logger.info("  Connection: %s", default_config['connection'])
+    logger.info("  Model: %s", default_config['model'])
 
-    # Create and return agent
+    # Create (or reuse) the agent for this configuration
     try:
-        agent = NL2SQLRedshiftAgent(
+        agent = _build_agent(
             project_id=default_config["project_id"],
             location=default_config["location"],
             connection=default_config["connection"],
             model=default_config["model"],
             service_account_path=default_config.get("service_account_path"),
-            debug=default_config.get("debug", debug)
+            debug=default_config.get("debug", debug),
+            context_cache=bool(default_config.get("context_cache", False)),
+            enable_cache=enable_cache,
+            config_digest=config_digest,
+            prefetch_follow_ups=bool(default_config.get("prefetch_follow_ups", False)),
+            cache_path=default_config.get("cache_path"),
+            compact_schema=bool(default_config.get("compact_schema", False)),
+            semantic_cache=bool(default_config.get("semantic_cache", False))
         )
 
         logger.info("✅ Agent created successfully from configuration")
         return agent
 
     except Exception as e:
-        logger.error(f"Failed to create agent from configuration: {e}")
+        logger.error("Failed to create agent from configuration: %s", e)
         raise
 
 
-def _validate_config_structure(config: Dict[str, Any]) -> None:
+@lru_cache(maxsize=16)
+def _load_config(config_path: str, mtime_ns: int, size: int) -> tuple[str, dict[str, Any]]:
+    """
+    Read and parse a config file, memoized on its stat signature.
+
+    ``mtime_ns`` and ``size`` only form part of the cache key, so an edited
+    file is re-read. Returns the SHA-256 of the file contents (used to key the
+    agent cache) and the parsed dictionary; callers must copy it before
+    mutating.
+    """
+    with open(config_path, 'rb') as f:
+        raw_config = f.read()
+
+    return hashlib.sha256(raw_config).hexdigest(), fast_loads(raw_config)
+
+
+def _validate_config_structure(config: dict[str, Any]) -> None:
     """
     Validate configuration file structure and values.
 
@@ -563,25 +1331,24 @@ def _validate_config_structure(config: Dict[str, Any]) -> None:
     """
 
     # Required fields
-    required_fields = ["project_id"]
-    for field in required_fields:
+    for field in _REQUIRED_CONFIG_FIELDS:
         if field not in config or not config[field]:
             raise ValueError(f"Required configuration field '{field}' is missing or empty")
 
     # Optional fields with validation
     if "location" in config:
-        valid_locations = ["us-central1", "us-east1", "us-west1", "europe-west1", "asia-northeast1"]
-        if config["location"] not in valid_locations:
-            logging.warning(f"Unusual location: {config['location']}. Common locations are: {valid_locations}")
+        if config["location"] not in _VALID_LOCATIONS:
+            logging.warning("Unusual location: %s. Common locations are: %s",
+                            config["location"], ", ".join(sorted(_VALID_LOCATIONS)))
 
     if "model" in config:
         if not config["model"].startswith("gemini-"):
-            logging.warning(f"Unusual model: {config['model']}. Consider using a gemini-* model for best results")
+            logging.warning("Unusual model: %s. Consider using a gemini-* model for best results", config["model"])
 
     # Service account path validation
     if "service_account_path" in config:
         if config["service_account_path"] and not os.path.exists(config["service_account_path"]):
-            logging.warning(f"Service account file not found: {config['service_account_path']}")
+            logging.warning("Service account file not found: %s", config["service_account_path"])
 
 
 def create_agent_with_validation(project_id: str,
@@ -589,7 +1356,8 @@ def create_agent_with_validation(project_id: str,
                                 location: str = "us-central1",
                                 model: str = "gemini-2.0-flash",
                                 validate_connectivity: bool = True,
-                                debug: bool = False) -> NL2SQLRedshiftAgent:
+                                debug: bool = False,
+                                enable_cache: bool = True) -> NL2SQLRedshiftAgent:
     """
     Create agent with full validation and connectivity testing.
     Recommended for production deployments.
@@ -601,6 +1369,7 @@ def create_agent_with_validation(project_id: str,
         model: Gemini model to use
         validate_connectivity: Test Integration Connector connectivity
         debug: Enable debug logging
+        enable_cache: Reuse answers to repeated questions
 
     Returns:
         Validated NL2SQLRedshiftAgent instance
@@ -615,13 +1384,17 @@ def create_agent_with_validation(project_id: str,
 
     logger.info("Creating agent with full validation...")
 
-    # Create agent
-    agent = NL2SQLRedshiftAgent(
+    # Create (or reuse) agent
+    agent = _build_agent(
         project_id=project_id,
         location=location,
         connection=connection,
         model=model,
-        debug=debug
+        service_account_path=None,
+        debug=debug,
+        context_cache=False,
+        enable_cache=enable_cache,
+        config_digest=None
     )
 
     # Validate setup
@@ -0,0 +1,322 @@
+"""
+Response caching for the NL2SQL Redshift Agent.
+Lets near-identical questions reuse a previous answer instead of another
+Gemini + Redshift round trip.
+"""
+
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+from .serialization import fast_dumps, fast_loads
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_NUMBER_WORDS = {
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
+    "six": "6", "seven": "7", "eight": "8", "nine": "9", "ten": "10",
+    "twenty": "20", "fifty": "50", "hundred": "100",
+}
+_NUMBER_WORD_RE = re.compile(r"\b(" + "|".join(_NUMBER_WORDS) + r")\b")
+
+# Words that don't change what a question asks for
+_FILLER_WORDS = frozenset({"the", "a", "an", "me", "please", "show", "list"})
+
+# Most texts Vertex AI accepts in one embedding request
+_EMBED_BATCH_SIZE = 250
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase a question and collapse whitespace, for exact-match lookups."""
+    return _WHITESPACE_RE.sub(" ", question.strip().lower())
+
+
+def canonicalize_question(question: str) -> str:
+    """
+    Reduce a question to a cache key that ignores wording differences that
+    don't change what is asked: case, spacing, trailing punctuation, filler
+    words and spelled-out numbers ("Show me the top five brands?" and
+    "top 5 brands" give the same key).
+    """
+
+    text = _NUMBER_WORD_RE.sub(lambda match: _NUMBER_WORDS[match.group(1)], question.lower())
+    canonical = " ".join(word for word in text.split() if word not in _FILLER_WORDS).rstrip("?.! ")
+    return canonical or normalize_question(question)
+
+
+class EmbeddingModelUnavailable(RuntimeError):
+    """The embedding model could not be loaded; the load is not retried."""
+
+
+class QuestionEmbedder:
+    """
+    Embeds questions with a Vertex AI text embedding model.
+    The model is loaded on first use, and vectors are remembered per text so
+    a question is only embedded once. A failed load is remembered too, and
+    later calls raise EmbeddingModelUnavailable without trying again.
+    """
+
+    def __init__(self, project_id: str, location: str, model_name: str = "text-embedding-004",
+                 max_cached: int = 1024):
+        self.project_id = project_id
+        self.location = location
+        self.model_name = model_name
+        self.max_cached = max_cached
+        self._model = None
+        self._load_error: Optional[Exception] = None
+        self._model_lock = threading.Lock()
+        self._vectors: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Return one embedding vector per input text.
+
+        Texts without a remembered vector are embedded together, in as few
+        requests as the API allows.
+
+        Raises:
+            EmbeddingModelUnavailable: If the embedding model can't be loaded
+        """
+
+        texts = list(texts)
+        with self._lock:
+            found = {text: self._vectors[text] for text in texts if text in self._vectors}
+
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        if missing:
+            model = self._load_model()
+            vectors = []
+            for start in range(0, len(missing), _EMBED_BATCH_SIZE):
+                batch = missing[start:start + _EMBED_BATCH_SIZE]
+                vectors.extend(embedding.values for embedding in model.get_embeddings(batch))
+
+            fresh = dict(zip(missing, vectors))
+            found.update(fresh)
+            with self._lock:
+                self._vectors.update(fresh)
+                while len(self._vectors) > self.max_cached:
+                    self._vectors.popitem(last=False)
+
+        return [found[text] for text in texts]
+
+    def _load_model(self) -> Any:
+        """Load the embedding model once; a failure is recorded and re-raised on every later call."""
+
+        with self._model_lock:
+            if self._model is None:
+                if self._load_error is not None:
+                    raise EmbeddingModelUnavailable(str(self._load_error)) from self._load_error
+                try:
+                    import vertexai
+                    from vertexai.language_models import TextEmbeddingModel
+
+                    vertexai.init(project=self.project_id, location=self.location)
+                    self._model = TextEmbeddingModel.from_pretrained(self.model_name)
+                except Exception as e:
+                    self._load_error = e
+                    raise EmbeddingModelUnavailable(str(e)) from e
+            return self._model
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    """Cosine similarity of two vectors (0.0 if either is all zeros)."""
+
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class SemanticResponseCache:
+    """
+    In-memory cache of agent results keyed by question embedding.
+
+    A lookup hits when a stored question in the same namespace (e.g. schema
+    version + context) has cosine similarity >= ``threshold``. Entries expire
+    after ``ttl_seconds`` and the least recently used entry is evicted once
+    ``max_entries`` is reached.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 256, ttl_seconds: float = 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def get(self, vector: Sequence[float], namespace: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result most similar to ``vector``, if close enough."""
+
+        now = time.monotonic()
+        with self._lock:
+            self._entries = [e for e in self._entries if now - e["stored_at"] < self.ttl_seconds]
+
+            best, best_score = None, self.threshold
+            for entry in self._entries:
+                if entry["namespace"] != namespace:
+                    continue
+                score = cosine_similarity(vector, entry["vector"])
+                if score >= best_score:
+                    best, best_score = entry, score
+
+            if best is None:
+                self.misses += 1
+                return None
+
+            # Keep recently used entries at the end so eviction drops the oldest
+            self._entries.remove(best)
+            self._entries.append(best)
+            self.hits += 1
+            return best["result"]
+
+    def put(self, vector: Sequence[float], namespace: str, result: Dict[str, Any]) -> None:
+        """Store a result under the given question embedding."""
+
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(0)
+            self._entries.append({
+                "namespace": namespace,
+                "vector": list(vector),
+                "result": result,
+                "stored_at": time.monotonic()
+            })
+
+    def clear(self) -> None:
+        """Remove all cached results."""
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class ExactResponseCache:
+    """
+    LRU cache of agent results keyed by an exact (canonicalized) question.
+
+    Sits in front of SemanticResponseCache: a repeated question is answered
+    without the embedding round trip. Entries expire after ``ttl_seconds``.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Return the result stored under ``key``, if present and fresh."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry["stored_at"] >= self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["result"]
+
+    def put(self, key: Hashable, result: Dict[str, Any]) -> None:
+        """Store a result, evicting the least recently used entry when full."""
+
+        with self._lock:
+            self._entries[key] = {"result": result, "stored_at": time.monotonic()}
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached results."""
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class PersistentResponseCache:
+    """
+    SQLite-backed store of agent results that survives restarts.
+
+    Sits behind the in-memory caches: answers are written through, and a
+    memory miss falls back to an exact (namespace, question) lookup or to the
+    most similar stored embedding with cosine similarity >= ``threshold``.
+    Rows older than ``ttl_seconds`` are ignored and deleted when the cache is
+    opened.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.95, ttl_seconds: float = 7 * 86400):
+        self.path = os.path.expanduser(path)
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "namespace TEXT NOT NULL, question TEXT NOT NULL, embedding BLOB, "
+                "result BLOB NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, question))"
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - ttl_seconds,))
+
+    def get(self, namespace: str, question: str) -> Optional[Dict[str, Any]]:
+        """Return the result stored for a normalized question, if fresh."""
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM responses WHERE namespace = ? AND question = ? AND created_at >= ?",
+                (namespace, question, time.time() - self.ttl_seconds)
+            ).fetchone()
+        return fast_loads(row[0]) if row else None
+
+    def get_similar(self, vector: Sequence[float], namespace: str) -> Optional[Dict[str, Any]]:
+        """Return the stored result whose question embedding is most similar to ``vector``."""
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT embedding, result FROM responses "
+                "WHERE namespace = ? AND embedding IS NOT NULL AND created_at >= ?",
+                (namespace, time.time() - self.ttl_seconds)
+            ).fetchall()
+
+        best, best_score = None, self.threshold
+        for embedding, result in rows:
+            stored = array("f")
+            stored.frombytes(embedding)
+            score = cosine_similarity(vector, stored)
+            if score >= best_score:
+                best, best_score = result, score
+        return fast_loads(best) if best is not None else None
+
+    def put(self, namespace: str, question: str, vector: Optional[Sequence[float]],
+            result: Dict[str, Any]) -> None:
+        """Store a result under a normalized question and, if given, its embedding."""
+
+        embedding = array("f", vector).tobytes() if vector is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (namespace, question, embedding, fast_dumps(result, default=str), time.time())
+            )
+
+    def clear(self) -> None:
+        """Remove all stored results."""
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
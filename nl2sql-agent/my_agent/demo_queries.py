@@ -2,10 +2,162 @@
 Demo queries and test cases for the NL2SQL Redshift Agent.
 """
 
-from typing import List, Dict
+import io
+import sys
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, List, Dict, Mapping, NamedTuple, Optional, Tuple
 from .agent import NL2SQLRedshiftAgent
 
 
+# Serializes demo output blocks written from worker threads
+_OUTPUT_LOCK = threading.Lock()
+
+# Core demo queries from the implementation plan, used by the quick demo
+_CORE_QUERIES = (
+    "How many apparels were sold in the last quarter?",
+    "What are the top 5 selling apparel brands?",
+    "Show sales by region for electronics",
+    "Which customers bought the most items?",
+)
+
+
+def _write_block(text: str) -> None:
+    """Write a block of demo output to stdout in one call, without interleaving."""
+    with _OUTPUT_LOCK:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+
+def _buffered(print_fn, *args) -> None:
+    """Run a ``_print_*`` helper into a buffer and write its output as one block."""
+    buf = io.StringIO()
+    print_fn(*args, file=buf)
+    _write_block(buf.getvalue())
+
+
+def _freeze_demo_query(query: Dict[str, Any]) -> Mapping[str, Any]:
+    """Attach lowercased needles for _analyze_result and make a demo query read-only."""
+    return MappingProxyType({
+        **query,
+        "_tables_lc": tuple(t.lower() for t in query["expected_tables"]),
+        "_ops_lc": tuple(op.lower() for op in query["expected_operations"]),
+    })
+
+
+def _public_fields(query_info: Mapping[str, Any]) -> Dict[str, Any]:
+    """A demo query as a plain dict, without the needles _freeze_demo_query adds."""
+    return {key: value for key, value in query_info.items() if not key.startswith("_")}
+
+
+# Demo queries are static, so they are built once at import time
+_DEMO_QUERIES: Tuple[Mapping[str, Any], ...] = tuple(_freeze_demo_query(query) for query in [
+    {
+        "category": "Revolve Orders Analysis",
+        "question": "Show me the number of Revolve orders and AOV for the United Kingdom between 8/25/22 - 8/24/23 vs. 8/25/21 - 8/24/22, split by Category",
+        "expected_tables": ["bi_report.shipmentnumber_rs", "mars__revolveclothing_com___db.product", "mars__id.id_categorynames2"],
+        "expected_operations": ["JOIN", "COUNT", "AVG", "CASE", "GROUP BY", "date filtering"],
+        "business_context": "Primary client test case - year-over-year Revolve AOV analysis by category for UK market",
+        "business_rules": ["Use site <> 'F' for Revolve orders", "Use shipmentnumber_rs for product analysis", "Proper category mapping"]
+    },
+    {
+        "category": "High Value Customer Analysis",
+        "question": "Get top 10 brands and categories based on projected net sales for top 5% high value customers",
+        "expected_tables": ["bi_report.ordernumber_rs", "bi_report.shipmentnumber_rs", "mars__revolveclothing_com___db.product", "mars__id.id_categorynames2"],
+        "expected_operations": ["CTE", "PERCENTILE_CONT", "JOIN", "GROUP BY", "ORDER BY", "LIMIT"],
+        "business_context": "High-value customer segmentation and brand performance analysis",
+        "business_rules": ["Use a PERCENTILE_CONT threshold for top 5%", "Use projnetsales_shipped metric", "Proper product code mapping"]
+    },
+    {
+        "category": "Payment Analysis",
+        "question": "Show number of transactions and average monthly gross sales through ANET excluding ApplePay orders",
+        "expected_tables": ["bi_report.ordernumber_rs", "mars__revolveclothing_com___db.orders"],
+        "expected_operations": ["JOIN", "COUNT", "AVG", "GROUP BY", "EXTRACT", "WHERE"],
+        "business_context": "Payment method analysis excluding specific token services",
+        "business_rules": ["Join with orders table for paymenttokenservice", "Filter paymenttype = 'ANET'", "Exclude ApplePay"]
+    },
+    {
+        "category": "Shipping Loss Analysis",
+        "question": "Analyze Ontrac and UPS loss rates by order value, include signature required filter",
+        "expected_tables": ["bi_report.shipmentnumber_rs", "mars__revolveclothing_com___db.orders", "mars__revolveclothing_com___db.shipment", "mars__id.shipping_pickuptime"],
+        "expected_operations": ["JOIN", "CASE", "COUNT", "SUM", "GROUP BY", "calculation"],
+        "business_context": "Shipping carrier performance analysis with loss rate calculations",
+        "business_rules": ["Use 'lost package' not 'lost'", "Use shipping_pickuptime for accurate carrier info", "Include sigrequired"]
+    },
+    {
+        "category": "Customer Survey Sampling",
+        "question": "Get 5K random REVOLVE customers who made purchases in the last 12 months with their last transaction details",
+        "expected_tables": ["bi_report.ordernumber_rs"],
+        "expected_operations": ["ROW_NUMBER", "RANDOM", "ORDER BY", "LIMIT", "date filtering"],
+        "business_context": "Random customer sampling for survey purposes",
+        "business_rules": ["Use RANDOM() for sampling", "Get last transaction per customer", "Site = 'R' for Revolve"]
+    },
+    {
+        "category": "Brand Performance",
+        "question": "What are the top selling brands this quarter by projected net sales?",
+        "expected_tables": ["bi_report.shipmentnumber_rs", "mars__revolveclothing_com___db.product"],
+        "expected_operations": ["JOIN", "GROUP BY", "SUM", "ORDER BY", "date filtering"],
+        "business_context": "Quarterly brand performance tracking",
+        "business_rules": ["Use shipmentnumber_rs for product data", "Use projnetsales_shipped metric"]
+    },
+    {
+        "category": "Regional Analysis",
+        "question": "Which shipping countries have the highest net sales for the current quarter?",
+        "expected_tables": ["bi_report.shipmentnumber_rs"],
+        "expected_operations": ["GROUP BY", "SUM", "ORDER BY", "date filtering"],
+        "business_context": "Geographic performance analysis",
+        "business_rules": ["Use shippingcountry field", "Current quarter filtering"]
+    },
+    {
+        "category": "Time Series Analysis",
+        "question": "Show monthly sales trends for the last 6 months using net sales",
+        "expected_tables": ["bi_report.ordernumber_rs"],
+        "expected_operations": ["GROUP BY", "SUM", "EXTRACT", "ORDER BY", "date filtering"],
+        "business_context": "Monthly sales trending analysis",
+        "business_rules": ["Use netsales from ordernumber_rs", "6 months date filtering"]
+    },
+    {
+        "category": "Category Performance",
+        "question": "Compare average order value by product category for Revolve orders",
+        "expected_tables": ["bi_report.shipmentnumber_rs", "mars__revolveclothing_com___db.product", "mars__id.id_categorynames2"],
+        "expected_operations": ["JOIN", "GROUP BY", "AVG", "category mapping"],
+        "business_context": "Category-wise AOV comparison for business insights",
+        "business_rules": ["Use site <> 'F'", "Category mapping via product code", "Use shipmentnumber_rs for product analysis"]
+    },
+    {
+        "category": "Customer Retention",
+        "question": "Find customers who made multiple purchases in the last year",
+        "expected_tables": ["bi_report.ordernumber_rs"],
+        "expected_operations": ["GROUP BY", "COUNT", "HAVING", "date filtering"],
+        "business_context": "Customer loyalty and retention analysis",
+        "business_rules": ["Count distinct transactions per customer", "12 month date filtering"]
+    }
+])
+
+
+class QueryAnalysis(NamedTuple):
+    """Heuristic checks of an agent response against a demo's expectations."""
+    executed_successfully: bool
+    error_message: str
+    expected_tables_check: str = "pending"
+    expected_operations_check: str = "pending"
+    response_quality: str = "pending"
+
+
+class DemoOutcome(NamedTuple):
+    """Result of running one demo query."""
+    query_info: Mapping[str, Any]
+    execution_result: Dict[str, Any]
+    success: bool
+    # Answered by the agent's response cache
+    cached: bool
+    analysis: QueryAnalysis
+
+
 class DemoQueryRunner:
     """
     Runs demo queries to test and validate the NL2SQL agent.
@@ -13,98 +165,17 @@ class DemoQueryRunner:
     
     def __init__(self, agent: NL2SQLRedshiftAgent):
         self.agent = agent
+        # Whether every demo in the most recent run succeeded
+        self.success = True
     
-    def get_demo_queries(self) -> List[Dict]:
+    def get_demo_queries(self) -> List[Mapping[str, Any]]:
         """
         Get comprehensive demo queries for testing the agent.
         """
         
-        queries = [
-            {
-                "category": "Revolve Orders Analysis",
-                "question": "Show me the number of Revolve orders and AOV for the United Kingdom between 8/25/22 - 8/24/23 vs. 8/25/21 - 8/24/22, split by Category",
-                "expected_tables": ["bi_report.shipmentnumber_rs", "mars__revolveclothing_com___db.product", "mars__id.id_categorynames2"],
-                "expected_operations": ["JOIN", "COUNT", "AVG", "CASE", "GROUP BY", "date filtering"],
-                "business_context": "Primary client test case - year-over-year Revolve AOV analysis by category for UK market",
-                "business_rules": ["Use site <> 'F' for Revolve orders", "Use shipmentnumber_rs for product analysis", "Proper category mapping"]
-            },
-            {
-                "category": "High Value Customer Analysis",
-                "question": "Get top 10 brands and categories based on projected net sales for top 5% high value customers",
-                "expected_tables": ["bi_report.ordernumber_rs", "bi_report.shipmentnumber_rs", "mars__revolveclothing_com___db.product", "mars__id.id_categorynames2"],
-                "expected_operations": ["CTE", "PERCENT_RANK", "JOIN", "GROUP BY", "ORDER BY", "LIMIT"],
-                "business_context": "High-value customer segmentation and brand performance analysis",
-                "business_rules": ["Use PERCENT_RANK for top 5%", "Use projnetsales_shipped metric", "Proper product code mapping"]
-            },
-            {
-                "category": "Payment Analysis",
-                "question": "Show number of transactions and average monthly gross sales through ANET excluding ApplePay orders",
-                "expected_tables": ["bi_report.ordernumber_rs", "mars__revolveclothing_com___db.orders"],
-                "expected_operations": ["JOIN", "COUNT", "AVG", "GROUP BY", "EXTRACT", "WHERE"],
-                "business_context": "Payment method analysis excluding specific token services",
-                "business_rules": ["Join with orders table for paymenttokenservice", "Filter paymenttype = 'ANET'", "Exclude ApplePay"]
-            },
-            {
-                "category": "Shipping Loss Analysis",
-                "question": "Analyze Ontrac and UPS loss rates by order value, include signature required filter",
-                "expected_tables": ["bi_report.shipmentnumber_rs", "mars__revolveclothing_com___db.orders", "mars__revolveclothing_com___db.shipment", "mars__id.shipping_pickuptime"],
-                "expected_operations": ["JOIN", "CASE", "COUNT", "SUM", "GROUP BY", "calculation"],
-                "business_context": "Shipping carrier performance analysis with loss rate calculations",
-                "business_rules": ["Use 'lost package' not 'lost'", "Use shipping_pickuptime for accurate carrier info", "Include sigrequired"]
-            },
-            {
-                "category": "Customer Survey Sampling",
-                "question": "Get 5K random REVOLVE customers who made purchases in the last 12 months with their last transaction details",
-                "expected_tables": ["bi_report.ordernumber_rs"],
-                "expected_operations": ["ROW_NUMBER", "RANDOM", "ORDER BY", "LIMIT", "date filtering"],
-                "business_context": "Random customer sampling for survey purposes",
-                "business_rules": ["Use RANDOM() for sampling", "Get last transaction per customer", "Site = 'R' for Revolve"]
-            },
-            {
-                "category": "Brand Performance",
-                "question": "What are the top selling brands this quarter by projected net sales?",
-                "expected_tables": ["bi_report.shipmentnumber_rs", "mars__revolveclothing_com___db.product"],
-                "expected_operations": ["JOIN", "GROUP BY", "SUM", "ORDER BY", "date filtering"],
-                "business_context": "Quarterly brand performance tracking",
-                "business_rules": ["Use shipmentnumber_rs for product data", "Use projnetsales_shipped metric"]
-            },
-            {
-                "category": "Regional Analysis",
-                "question": "Which shipping countries have the highest net sales for the current quarter?",
-                "expected_tables": ["bi_report.shipmentnumber_rs"],
-                "expected_operations": ["GROUP BY", "SUM", "ORDER BY", "date filtering"],
-                "business_context": "Geographic performance analysis",
-                "business_rules": ["Use shippingcountry field", "Current quarter filtering"]
-            },
-            {
-                "category": "Time Series Analysis",
-                "question": "Show monthly sales trends for the last 6 months using net sales",
-                "expected_tables": ["bi_report.ordernumber_rs"],
-                "expected_operations": ["GROUP BY", "SUM", "EXTRACT", "ORDER BY", "date filtering"],
-                "business_context": "Monthly sales trending analysis",
-                "business_rules": ["Use netsales from ordernumber_rs", "6 months date filtering"]
-            },
-            {
-                "category": "Category Performance",
-                "question": "Compare average order value by product category for Revolve orders",
-                "expected_tables": ["bi_report.shipmentnumber_rs", "mars__revolveclothing_com___db.product", "mars__id.id_categorynames2"],
-                "expected_operations": ["JOIN", "GROUP BY", "AVG", "category mapping"],
-                "business_context": "Category-wise AOV comparison for business insights",
-                "business_rules": ["Use site <> 'F'", "Category mapping via product code", "Use shipmentnumber_rs for product analysis"]
-            },
-            {
-                "category": "Customer Retention",
-                "question": "Find customers who made multiple purchases in the last year",
-                "expected_tables": ["bi_report.ordernumber_rs"],
-                "expected_operations": ["GROUP BY", "COUNT", "HAVING", "date filtering"],
-                "business_context": "Customer loyalty and retention analysis",
-                "business_rules": ["Count distinct transactions per customer", "12 month date filtering"]
-            }
-        ]
-        
-        return queries
+        return list(_DEMO_QUERIES)
     
-    def run_single_demo(self, query_info: Dict, verbose: bool = True) -> Dict:
+    def run_single_demo(self, query_info: Dict, verbose: bool = True) -> DemoOutcome:
         """
         Run a single demo query and return results.
         
@@ -113,169 +184,298 @@ class DemoQueryRunner:
             verbose: Whether to print detailed output
             
         Returns:
-            Dictionary with query results and analysis
+            Query result and analysis
         """
         
-        if verbose:
-            print(f"\n{'='*60}")
-            print(f"Demo Query: {query_info['category']}")
-            print(f"Question: {query_info['question']}")
-            print(f"Context: {query_info['business_context']}")
-            print(f"{'='*60}")
-        
         # Execute the query using the agent
         result = self.agent.process_question(query_info["question"])
         
-        # Analyze the results
-        analysis = {
-            "query_info": query_info,
-            "execution_result": result,
-            "success": result.get("success", False),
-            "analysis": self._analyze_result(result, query_info)
-        }
+        return self._report_demo(query_info, result, verbose)
+    
+    def _print_demo_header(self, query_info: Dict, file=None):
+        """Print the banner shown before a demo query's result."""
+        
+        print(f"\n{'='*60}", file=file)
+        print(f"Demo Query: {query_info['category']}", file=file)
+        print(f"Question: {query_info['question']}", file=file)
+        print(f"Context: {query_info['business_context']}", file=file)
+        print(f"{'='*60}", file=file)
+    
+    def _report_demo(self, query_info: Dict, result: Dict, verbose: bool,
+                     position: Optional[str] = None) -> DemoOutcome:
+        """Build a demo result and, if verbose, write its output as one block."""
+        
+        if not verbose:
+            return self._build_demo_result(query_info, result, False)
+        
+        buf = io.StringIO()
+        if position:
+            print(f"\n{position} Demo query result", file=buf)
+        self._print_demo_header(query_info, file=buf)
+        outcome = self._build_demo_result(query_info, result, True, file=buf)
+        _write_block(buf.getvalue())
+        return outcome
+    
+    def _build_demo_result(self, query_info: Dict, result: Dict, verbose: bool, file=None) -> DemoOutcome:
+        """Analyze an agent result for a demo query and optionally print it."""
+        
+        outcome = DemoOutcome(
+            query_info=query_info,
+            execution_result=result,
+            success=result.get("success", False),
+            cached=result.get("cached", False),
+            analysis=self._analyze_result(result, query_info)
+        )
+        
+        if not outcome.success:
+            self.success = False
         
         if verbose:
-            self._print_result_analysis(analysis)
+            self._print_result_analysis(outcome, file=file)
         
-        return analysis
+        return outcome
     
-    def run_all_demos(self, verbose: bool = True) -> List[Dict]:
+    def run_all_demos(self, verbose: bool = True, batch: bool = False, fail_fast: bool = False,
+                      max_workers: int = 8) -> List[DemoOutcome]:
         """
         Run all demo queries and return comprehensive results.
+        
+        Blocking wrapper around ``arun_all_demos``; call that directly from
+        code that already runs an event loop.
+        
+        Args:
+            verbose: Whether to print detailed output
+            batch: Send all questions to the agent in a single call
+            fail_fast: Don't start further demos once one has failed; demos
+                that were skipped are left out of the results
+            max_workers: Maximum agent calls in flight (respect Gemini QPS limits)
+        
+        Returns:
+            Demo results in demo order; ``self.success`` reports whether all of them passed
         """
         
-        demo_queries = self.get_demo_queries()
-        results = []
+        return asyncio.run(self.arun_all_demos(verbose=verbose, max_concurrency=max_workers,
+                                               fail_fast=fail_fast, batch=batch))
+    
+    async def arun_all_demos(self, verbose: bool = True, max_concurrency: int = 8,
+                             fail_fast: bool = False, batch: bool = False) -> List[DemoOutcome]:
+        """
+        Run all demo queries concurrently and return results in demo order.
         
-        if verbose:
-            print(f"\nRunning {len(demo_queries)} demo queries...")
+        Args:
+            verbose: Whether to print detailed output
+            max_concurrency: Maximum agent calls in flight (respect Gemini QPS limits)
+            fail_fast: Don't start further demos once one has failed; demos
+                that were skipped are left out of the results
+            batch: Send all questions to the agent in a single call
         
-        for i, query_info in enumerate(demo_queries, 1):
+        Returns:
+            Demo results; ``self.success`` reports whether all of them passed
+        """
+        
+        demo_queries = self.get_demo_queries()
+        self.success = True
+        
+        if batch:
             if verbose:
-                print(f"\n[{i}/{len(demo_queries)}] Running demo query...")
+                print(f"\nRunning {len(demo_queries)} demo queries in one batch...")
             
-            result = self.run_single_demo(query_info, verbose=verbose)
-            results.append(result)
+            outcomes = await asyncio.to_thread(self.agent.batch_process_questions, [q["question"] for q in demo_queries])
+            if fail_fast:
+                # Every answer arrives at once; keep those up to the first failure,
+                # as if the later demos had not been started
+                failures = [i for i, outcome in enumerate(outcomes) if not outcome.get("success")]
+                if failures:
+                    outcomes = outcomes[:failures[0] + 1] + [None] * (len(outcomes) - failures[0] - 1)
+        else:
+            outcomes = await self._arun_concurrently(demo_queries, verbose, max_concurrency, fail_fast)
+        
+        results = []
+        for i, (query_info, outcome) in enumerate(zip(demo_queries, outcomes), 1):
+            if outcome is None:
+                continue
+            
+            if isinstance(outcome, Exception):
+                outcome = {
+                    "success": False,
+                    "error": str(outcome),
+                    "error_type": type(outcome).__name__,
+                    "user_question": query_info["question"]
+                }
+            
+            results.append(self._report_demo(query_info, outcome, verbose, f"[{i}/{len(demo_queries)}]"))
+        
+        if fail_fast and verbose and len(results) < len(demo_queries):
+            print("\n⛔ Skipped remaining demos after a failure (fail-fast)")
         
-        # Generate summary
         if verbose:
-            self._print_summary(results)
+            _buffered(self._print_summary, results)
         
         return results
     
-    def _analyze_result(self, result: Dict, query_info: Dict) -> Dict:
+    async def _arun_concurrently(self, demo_queries: List[Mapping[str, Any]], verbose: bool,
+                                 max_concurrency: int, fail_fast: bool) -> List[Any]:
+        """Ask the demo questions concurrently; skipped demos give None and errors their exception."""
+        
+        await asyncio.to_thread(self.agent.warm_question_embeddings, [q["question"] for q in demo_queries])
+        semaphore = asyncio.Semaphore(max_concurrency)
+        failed = asyncio.Event()
+        
+        async def run(query_info: Mapping[str, Any]) -> Optional[Dict]:
+            async with semaphore:
+                if fail_fast and failed.is_set():
+                    return None
+                try:
+                    result = await self.agent.aprocess_question(query_info["question"])
+                except Exception:
+                    failed.set()
+                    raise
+                if not result.get("success"):
+                    failed.set()
+                return result
+        
+        if verbose:
+            print(f"\nRunning {len(demo_queries)} demo queries (up to {max_concurrency} at a time)...")
+        
+        return await asyncio.gather(*(run(q) for q in demo_queries), return_exceptions=True)
+    
+    def _analyze_result(self, result: Dict, query_info: Dict) -> QueryAnalysis:
         """
         Analyze the execution result against expected outcomes.
         """
         
-        analysis = {
-            "executed_successfully": result.get("success", False),
-            "error_message": result.get("error", ""),
-            "expected_tables_check": "pending",
-            "expected_operations_check": "pending",
-            "response_quality": "pending"
-        }
+        if not result.get("success"):
+            return QueryAnalysis(executed_successfully=False, error_message=result.get("error", ""))
         
-        if result.get("success"):
-            # Check if expected tables were likely used
-            response_text = str(result.get("agent_response", "")).lower()
-            expected_tables = query_info.get("expected_tables", [])
-            
-            tables_found = 0
-            for table in expected_tables:
-                if table.lower() in response_text:
-                    tables_found += 1
-            
-            analysis["expected_tables_check"] = f"{tables_found}/{len(expected_tables)} tables referenced"
-            
-            # Check for expected operations
-            expected_ops = query_info.get("expected_operations", [])
-            ops_found = 0
-            for op in expected_ops:
-                if op.lower() in response_text:
-                    ops_found += 1
-            
-            analysis["expected_operations_check"] = f"{ops_found}/{len(expected_ops)} operations detected"
-            
-            # Basic response quality check
-            if len(response_text) > 50:  # Reasonable response length
-                analysis["response_quality"] = "adequate"
-            else:
-                analysis["response_quality"] = "too_short"
+        response_text = str(result.get("agent_response", ""))
+        expected_tables = query_info.get("_tables_lc")
+        if expected_tables is None:
+            expected_tables = [t.lower() for t in query_info.get("expected_tables", [])]
+        expected_ops = query_info.get("_ops_lc")
+        if expected_ops is None:
+            expected_ops = [op.lower() for op in query_info.get("expected_operations", [])]
         
-        return analysis
+        # Only pay for lowercasing the response when there is something to look for
+        haystack = response_text.lower() if expected_tables or expected_ops else ""
+        
+        # Check if expected tables were likely used
+        tables_found = sum(1 for table in expected_tables if table in haystack)
+        
+        # Check for expected operations
+        ops_found = sum(1 for op in expected_ops if op in haystack)
+        
+        return QueryAnalysis(
+            executed_successfully=True,
+            error_message=result.get("error", ""),
+            expected_tables_check=f"{tables_found}/{len(expected_tables)} tables referenced",
+            expected_operations_check=f"{ops_found}/{len(expected_ops)} operations detected",
+            # Basic response quality check: reasonable response length
+            response_quality="adequate" if len(response_text) > 50 else "too_short"
+        )
     
-    def _print_result_analysis(self, analysis: Dict):
+    def _print_result_analysis(self, outcome: DemoOutcome, file=None):
         """Print detailed analysis of a single query result."""
         
-        result = analysis["execution_result"]
-        query_analysis = analysis["analysis"]
+        result = outcome.execution_result
+        query_analysis = outcome.analysis
         
         if result.get("success"):
-            print("✅ Query executed successfully")
-            print(f"📊 Agent Response: {result.get('agent_response', 'No response')}")
-            print(f"🔍 Expected Tables: {query_analysis['expected_tables_check']}")
-            print(f"⚙️  Expected Operations: {query_analysis['expected_operations_check']}")
-            print(f"📝 Response Quality: {query_analysis['response_quality']}")
+            print("✅ Query executed successfully", file=file)
+            if outcome.cached:
+                print("♻️  Served from response cache", file=file)
+            print(f"📊 Agent Response: {result.get('agent_response', 'No response')}", file=file)
+            print(f"🔍 Expected Tables: {query_analysis.expected_tables_check}", file=file)
+            print(f"⚙️  Expected Operations: {query_analysis.expected_operations_check}", file=file)
+            print(f"📝 Response Quality: {query_analysis.response_quality}", file=file)
         else:
-            print("❌ Query execution failed")
-            print(f"🚨 Error: {result.get('error', 'Unknown error')}")
+            print("❌ Query execution failed", file=file)
+            print(f"🚨 Error: {result.get('error', 'Unknown error')}", file=file)
     
-    def _print_summary(self, results: List[Dict]):
+    def _print_summary(self, results: List[DemoOutcome], file=None):
         """Print summary of all demo query results."""
         
         total_queries = len(results)
-        successful_queries = sum(1 for r in results if r["success"])
+        successful_queries = sum(1 for r in results if r.success)
         
-        print(f"\n{'='*60}")
-        print("DEMO SUMMARY")
-        print(f"{'='*60}")
-        print(f"Total Queries: {total_queries}")
-        print(f"Successful: {successful_queries}")
-        print(f"Failed: {total_queries - successful_queries}")
-        print(f"Success Rate: {(successful_queries/total_queries)*100:.1f}%")
+        print(f"\n{'='*60}", file=file)
+        print("DEMO SUMMARY", file=file)
+        print(f"{'='*60}", file=file)
+        print(f"Total Queries: {total_queries}", file=file)
+        print(f"Successful: {successful_queries}", file=file)
+        print(f"Failed: {total_queries - successful_queries}", file=file)
+        print(f"Success Rate: {(successful_queries/total_queries)*100:.1f}%", file=file)
+        print(f"Cache Hits: {sum(1 for r in results if r.cached)}", file=file)
         
         # Category breakdown
-        categories = {}
-        for result in results:
-            category = result["query_info"]["category"]
-            if category not in categories:
-                categories[category] = {"total": 0, "success": 0}
-            categories[category]["total"] += 1
-            if result["success"]:
-                categories[category]["success"] += 1
-        
-        print(f"\nCategory Breakdown:")
-        for category, stats in categories.items():
-            success_rate = (stats["success"]/stats["total"])*100
-            print(f"  {category}: {stats['success']}/{stats['total']} ({success_rate:.1f}%)")
+        totals = Counter(r.query_info["category"] for r in results)
+        successes = Counter(r.query_info["category"] for r in results if r.success)
+        
+        print(f"\nCategory Breakdown:", file=file)
+        for category, total in totals.items():
+            success_rate = (successes[category]/total)*100
+            print(f"  {category}: {successes[category]}/{total} ({success_rate:.1f}%)", file=file)
         
         # Failed queries
-        failed_queries = [r for r in results if not r["success"]]
+        failed_queries = [r for r in results if not r.success]
         if failed_queries:
-            print(f"\nFailed Queries:")
+            print(f"\nFailed Queries:", file=file)
             for result in failed_queries:
-                query = result["query_info"]["question"]
-                error = result["execution_result"].get("error", "Unknown error")
-                print(f"  ❌ '{query}' - {error}")
+                query = result.query_info["question"]
+                error = result.execution_result.get("error", "Unknown error")
+                print(f"  ❌ '{query}' - {error}", file=file)
+    
+    def run_quick_demo(self, max_workers: int = 4) -> None:
+        """
+        Run a quick demo with the most important queries.
+        
+        Args:
+            max_workers: Maximum agent calls in flight
+        """
+        
+        print("🚀 Running Quick Demo with Core Queries")
+        print("="*60)
+        
+        self.agent.warm_question_embeddings(_CORE_QUERIES)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(_CORE_QUERIES)))) as executor:
+            results = list(executor.map(self.agent.process_question, _CORE_QUERIES))
+        
+        for i, (question, result) in enumerate(zip(_CORE_QUERIES, results), 1):
+            buf = io.StringIO()
+            print(f"\n[{i}/{len(_CORE_QUERIES)}] {question}", file=buf)
+            print("-" * 40, file=buf)
+            
+            if result.get("success"):
+                print("✅ Success! (cached)" if result.get("cached") else "✅ Success!", file=buf)
+                print(f"Response: {result.get('agent_response', 'No response')}", file=buf)
+            else:
+                print("❌ Failed!", file=buf)
+                print(f"Error: {result.get('error', 'Unknown error')}", file=buf)
+            
+            _write_block(buf.getvalue())
+        
+        print("\n🎉 Quick demo completed!")
     
-    def get_test_report(self, results: List[Dict]) -> Dict:
+    def get_test_report(self, results: List[DemoOutcome]) -> Dict:
         """
         Generate a structured test report from demo results.
         """
         
         total_queries = len(results)
-        successful_queries = sum(1 for r in results if r["success"])
+        successful_queries = sum(1 for r in results if r.success)
         
         report = {
-            "timestamp": str(pd.Timestamp.now()),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "summary": {
                 "total_queries": total_queries,
                 "successful_queries": successful_queries,
                 "failed_queries": total_queries - successful_queries,
-                "success_rate": (successful_queries/total_queries)*100 if total_queries > 0 else 0
+                "success_rate": (successful_queries/total_queries)*100 if total_queries > 0 else 0,
+                "cache_hits": sum(1 for r in results if r.cached)
             },
-            "detailed_results": results,
+            "detailed_results": [
+                {**r._asdict(), "query_info": _public_fields(r.query_info), "analysis": r.analysis._asdict()}
+                for r in results
+            ],
             "recommendations": []
         }
         
@@ -283,7 +483,7 @@ class DemoQueryRunner:
         if report["summary"]["success_rate"] < 80:
             report["recommendations"].append("Success rate below 80% - review agent configuration and prompts")
         
-        if any(not r["success"] for r in results):
+        if any(not r.success for r in results):
             report["recommendations"].append("Some queries failed - check Integration Connector connectivity")
         
         return report
@@ -294,30 +494,4 @@ def run_quick_demo(agent: NL2SQLRedshiftAgent) -> None:
     Run a quick demo with the most important queries.
     """
     
-    demo_runner = DemoQueryRunner(agent)
-    
-    # Core demo queries from the implementation plan
-    core_queries = [
-        "How many apparels were sold in the last quarter?",
-        "What are the top 5 selling apparel brands?", 
-        "Show sales by region for electronics",
-        "Which customers bought the most items?"
-    ]
-    
-    print("🚀 Running Quick Demo with Core Queries")
-    print("="*60)
-    
-    for i, question in enumerate(core_queries, 1):
-        print(f"\n[{i}/{len(core_queries)}] {question}")
-        print("-" * 40)
-        
-        result = agent.process_question(question)
-        
-        if result.get("success"):
-            print("✅ Success!")
-            print(f"Response: {result.get('agent_response', 'No response')}")
-        else:
-            print("❌ Failed!")
-            print(f"Error: {result.get('error', 'Unknown error')}")
-    
-    print("\n🎉 Quick demo completed!")
\ No newline at end of file
+    DemoQueryRunner(agent).run_quick_demo()
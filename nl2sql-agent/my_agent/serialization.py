@@ -0,0 +1,33 @@
+"""
+JSON helpers for the NL2SQL Redshift Agent.
+Uses orjson when it is installed and falls back to the standard library.
+"""
+
+import json
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def fast_loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse a JSON document.
+
+    Raises json.JSONDecodeError on invalid input with either backend
+    (orjson's error type subclasses it).
+    """
+
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def fast_dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Serialize an object to UTF-8 encoded JSON bytes."""
+
+    if orjson is not None:
+        return orjson.dumps(obj, default=default)
+    return json.dumps(obj, default=default, separators=(",", ":")).encode("utf-8")
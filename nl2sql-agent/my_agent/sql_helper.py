@@ -3,26 +3,200 @@ SQL Helper utilities for NL2SQL conversion, updated for client's Redshift schema
 Based on bi_report.ordernumber_rs and bi_report.shipmentnumber_rs tables.
 """
 
+import re
 import json
-from typing import Dict, List, Optional, Tuple
+import threading
+from collections import OrderedDict
+from functools import cached_property, lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from .cache import canonicalize_question
 from .tools import get_table_relationships, get_sample_queries, create_schema_tool
 
 
+# Sample-query selection rules in priority order: (group, question triggers,
+# sample-question keywords). The first group whose trigger appears in the user
+# question selects the samples whose question mentions one of its keywords.
+_SAMPLE_KEYWORD_GROUPS: Tuple[Tuple[str, Tuple[str, ...], Tuple[str, ...]], ...] = (
+    ("aov", ("aov", "average order", "order value"), ("aov", "order")),
+    ("high_value", ("high value", "top customer", "percentile"), ("high value", "percentile")),
+    ("payment", ("payment", "anet", "applepay"), ("anet", "payment")),
+    ("shipping", ("loss", "shipping", "carrier", "ups", "ontrac"), ("loss", "shipping")),
+    ("sampling", ("random", "sample", "survey"), ("random", "sample")),
+    ("brand", ("brand", "brands"), ("brand",)),
+    ("category", ("category", "categories"), ("category",)),
+)
+
+# All question triggers in one pattern; the lookahead reports every
+# (possibly overlapping) trigger position in a single scan, named by group
+_SAMPLE_TRIGGER_RE = re.compile("(?=" + "|".join(
+    f"(?P<{group}>{'|'.join(map(re.escape, triggers))})" for group, triggers, _ in _SAMPLE_KEYWORD_GROUPS
+) + ")")
+_SAMPLE_GROUP_PRIORITY = {group: i for i, (group, _, _) in enumerate(_SAMPLE_KEYWORD_GROUPS)}
+
+# Formatted sample blocks remembered per helper, keyed by canonical question
+_SAMPLE_SQL_MAX_CACHED = 256
+
+_REDSHIFT_DATA_TYPES = (
+    "SMALLINT", "INTEGER", "BIGINT", "DECIMAL", "NUMERIC",
+    "REAL", "DOUBLE PRECISION", "BOOLEAN", "CHAR", "VARCHAR",
+    "DATE", "TIMESTAMP", "TIMESTAMPTZ", "TIME", "TIMETZ",
+)
+
+# Client business rules, included in every SQL generation prompt
+_BUSINESS_RULES = (
+    "1. REVOLVE ORDERS: Use site <> 'F' to exclude Forward brand orders",
+    "2. PRODUCT JOINS: ordernumber_rs has NO product info, use shipmentnumber_rs for product-level analysis",
+    "3. PRODUCT CODE MAPPING: Use UPPER(TRIM(p.code)) = productcode when joining products",
+    "4. CATEGORY MAPPING: Extract category from product code: SUBSTRING(SPLIT_PART(p.code, '-', 2), 2, 1) = cn.lettercat",
+    "5. LOST PACKAGES: Use extrastatus = 'lost package' (NOT 'lost')",
+    "6. PAYMENT TOKEN: paymenttokenservice is in mars__revolveclothing_com___db.orders, NOT in ordernumber_rs",
+    "7. TOP PERCENTILES: For top 5%, filter on metric >= PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY metric) computed once in a CTE; window functions are not allowed in HAVING",
+    "8. SHIPPING CARRIERS: Use mars__id.shipping_pickuptime for accurate carrier info, not shipment.shippingoption",
+    "9. RANDOM SAMPLING: Use RANDOM() function with ORDER BY for random results",
+    "10. DATE RANGES: Use proper TIMESTAMP filtering with >= and < operators",
+)
+_BUSINESS_RULES_TEXT = "\n".join(_BUSINESS_RULES)
+
+# Example questions covering the client's main use cases
+_DEMO_QUESTIONS = (
+    "Show me the number of Revolve orders and AOV for the United Kingdom between 8/25/22 - 8/24/23 vs. 8/25/21 - 8/24/22, split by Category",
+    "Get top 10 brands and categories based on projected net sales for top 5% high value customers",
+    "Show number of transactions and average monthly gross sales through ANET excluding ApplePay orders",
+    "Analyze Ontrac and UPS loss rates by order value, include signature required filter",
+    "Get 5K random REVOLVE customers who made purchases in the last 12 months with their last transaction details",
+    "What are the top 10 brands by net sales for Revolve orders this year?",
+    "Compare average order value by product category for Revolve orders",
+)
+
+# Short type codes for the compact schema description
+_COMPACT_TYPE_CODES = {
+    "VARCHAR": "s", "CHAR": "s",
+    "SMALLINT": "i", "INTEGER": "i", "BIGINT": "i",
+    "DECIMAL": "d", "NUMERIC": "d",
+    "REAL": "f", "DOUBLE PRECISION": "f",
+    "BOOLEAN": "b",
+    "DATE": "dt", "TIMESTAMP": "ts", "TIMESTAMPTZ": "tstz",
+}
+
+_COMPACT_SCHEMA_LEGEND = (
+    "Format: T=table|description, R=business rules, C=columns as name:type separated by ' | '; "
+    "! primary key, >table.column foreign key, \"...\" column description. "
+    "Types: s=VARCHAR/CHAR, i=integer, d=DECIMAL, f=REAL/DOUBLE PRECISION, b=BOOLEAN, dt=DATE, ts=TIMESTAMP"
+)
+
+
+def _to_json(data: Any) -> str:
+    """JSON text of schema-like data (mapping proxies included), keeping key order."""
+    return json.dumps(data, default=dict)
+
+
+def _format_column(col: Dict[str, Any]) -> str:
+    """One column line of the schema description."""
+
+    if col.get("primary_key"):
+        key = " [PRIMARY KEY]"
+    elif col.get("foreign_key"):
+        key = f" [FOREIGN KEY -> {col['foreign_key']}]"
+    else:
+        key = ""
+    description = f" - {col['description']}" if col.get("description") else ""
+    return f"  - {col['name']} ({col['type']}){key}{description}"
+
+
+def _format_compact_column(col: Dict[str, Any]) -> str:
+    """One column entry of the compact schema description."""
+
+    base_type = col["type"].split("(", 1)[0].strip().upper()
+    entry = f"{col['name']}:{_COMPACT_TYPE_CODES.get(base_type, col['type'])}"
+    if col.get("primary_key"):
+        entry += "!"
+    elif col.get("foreign_key"):
+        entry += f">{col['foreign_key']}"
+    if col.get("description"):
+        entry += f' "{col["description"]}"'
+    return entry
+
+
+# The renderers below are pure functions of the JSON text of their input, so
+# helpers describing the same schema share one bounded, thread-safe memo.
+
+@lru_cache(maxsize=8)
+def _render_schema(schema_json: str, compact: bool) -> str:
+    """Schema description for prompts, full or compact."""
+
+    tables = json.loads(schema_json)["tables"]
+
+    if compact:
+        parts = [_COMPACT_SCHEMA_LEGEND]
+        for table_name, table_info in tables.items():
+            parts.append(f"\nT:{table_name}|{table_info['description']}")
+            if table_info.get("business_rules"):
+                parts.append(f"\nR:{'; '.join(table_info['business_rules'])}")
+            parts.append(f"\nC:{' | '.join(map(_format_compact_column, table_info['columns']))}")
+        return "".join(parts)
+
+    parts = []
+    for table_name, table_info in tables.items():
+        if parts:
+            parts.append("\n\n")
+        parts.append(f"Table: {table_name}\nDescription: {table_info['description']}\n")
+        if table_info.get("business_rules"):
+            parts.append(f"Business Rules: {'; '.join(table_info['business_rules'])}\n")
+        parts.append("Columns:\n")
+        parts.append("\n".join(map(_format_column, table_info["columns"])))
+    return "".join(parts)
+
+
+@lru_cache(maxsize=8)
+def _render_relationships(relationships_json: str) -> str:
+    """Table relationships for prompts, one line each."""
+
+    return "\n".join(
+        f"- {rel_name}: {rel_info['condition']} ({rel_info['description']})"
+        for rel_name, rel_info in json.loads(relationships_json).items()
+    )
+
+
 class RedshiftSQLHelper:
     """
     Helper class for SQL generation and validation for client's Redshift.
     Updated with business rules from the test document.
     """
 
+    redshift_data_types = _REDSHIFT_DATA_TYPES
+
+    # Everything below is loaded or derived on first use and dropped by invalidate_cache()
+    _CACHED_ATTRIBUTES = (
+        "schema_info", "relationships", "sample_queries", "_schema_json", "_relationships_json",
+        "business_rules", "_buildsql_prompt_prefix", "_sample_index",
+    )
+
     def __init__(self):
-        self.schema_info = create_schema_tool()
-        self.relationships = get_table_relationships()
-        self.sample_queries = get_sample_queries()
-        self.redshift_data_types = [
-            "SMALLINT", "INTEGER", "BIGINT", "DECIMAL", "NUMERIC",
-            "REAL", "DOUBLE PRECISION", "BOOLEAN", "CHAR", "VARCHAR",
-            "DATE", "TIMESTAMP", "TIMESTAMPTZ", "TIME", "TIMETZ"
-        ]
+        self._sample_sql_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._sample_sql_lock = threading.Lock()
+
+    @cached_property
+    def schema_info(self) -> Dict[str, Any]:
+        """Table definitions, loaded on first use."""
+        return create_schema_tool()
+
+    @cached_property
+    def relationships(self) -> Dict[str, Any]:
+        """Join conditions between tables, loaded on first use."""
+        return get_table_relationships()
+
+    @cached_property
+    def sample_queries(self) -> Dict[str, Any]:
+        """Example question/SQL pairs, loaded on first use."""
+        return get_sample_queries()
+
+    @cached_property
+    def _schema_json(self) -> str:
+        return _to_json(self.schema_info)
+
+    @cached_property
+    def _relationships_json(self) -> str:
+        return _to_json(self.relationships)
 
     def get_buildsql_prompt(self, user_question: str, context: Optional[str] = None) -> str:
         """
@@ -30,15 +204,28 @@ class RedshiftSQLHelper:
         Updated with client's business rules and Redshift schema.
         """
 
-        schema_description = self._format_schema_description()
         sample_sql = self._get_relevant_sample_sql(user_question)
-        business_rules = self._get_business_rules()
 
-        prompt = f"""
+        return f"""{self._buildsql_prompt_prefix}{sample_sql}
+
+<Additional Context>
+{context or 'No additional context provided'}
+
+<User Question>
+{user_question}
+
+Generate a syntactically and semantically correct Redshift SQL query following the business rules:
+"""
+
+    @cached_property
+    def _buildsql_prompt_prefix(self) -> str:
+        """The question-independent start of the SQL generation prompt, rendered once."""
+
+        return f"""
 You are a Redshift SQL expert for Revolve's e-commerce data. Write a query that answers the following question.
 
 <Critical Business Rules>
-{business_rules}
+{self.business_rules}
 
 <Guidelines>
 - Use fully qualified table names (bi_report.ordernumber_rs, mars__revolveclothing_com___db.orders, etc.)
@@ -46,7 +233,7 @@ You are a Redshift SQL expert for Revolve's e-commerce data. Write a query that
 - Product code joins: Use UPPER(TRIM(p.code)) = sn.productcode
 - Category mapping: Use SUBSTRING(SPLIT_PART(p.code, '-', 2), 2, 1) = cn.lettercat
 - Lost packages: Use extrastatus = 'lost package' (not 'lost')
-- High value customers: Use PERCENT_RANK() for percentile calculations
+- High value customers: Use a PERCENTILE_CONT() threshold for percentile cut-offs
 - Random sampling: Use RANDOM() function with ORDER BY
 - Payment token service: Must join with mars__revolveclothing_com___db.orders table
 - Date filtering: Use proper TIMESTAMP comparisons
@@ -54,108 +241,88 @@ You are a Redshift SQL expert for Revolve's e-commerce data. Write a query that
 - Generate clean SQL without ```sql or ``` markers
 
 <Database Schema>
-{schema_description}
+{self._format_schema_description()}
 
 <Table Relationships>
 {self._format_relationships()}
 
 <Sample Queries for Reference>
-{sample_sql}
+"""
 
-<Additional Context>
-{context or 'No additional context provided'}
+    def invalidate_cache(self) -> None:
+        """
+        Drop the loaded schema, relationships and samples and the prompt text
+        derived from them; they are reloaded on next use. Call after the
+        underlying definitions change.
+        """
 
-<User Question>
-{user_question}
+        for name in self._CACHED_ATTRIBUTES:
+            self.__dict__.pop(name, None)
+        with self._sample_sql_lock:
+            self._sample_sql_cache.clear()
 
-Generate a syntactically and semantically correct Redshift SQL query following the business rules:
-"""
-        return prompt
+    @cached_property
+    def business_rules(self) -> str:
+        """Client business rules, formatted once per helper."""
+        return self._get_business_rules()
 
     def _get_business_rules(self) -> str:
         """Get client-specific business rules."""
 
-        rules = [
-            "1. REVOLVE ORDERS: Use site <> 'F' to exclude Forward brand orders",
-            "2. PRODUCT JOINS: ordernumber_rs has NO product info, use shipmentnumber_rs for product-level analysis",
-            "3. PRODUCT CODE MAPPING: Use UPPER(TRIM(p.code)) = productcode when joining products",
-            "4. CATEGORY MAPPING: Extract category from product code: SUBSTRING(SPLIT_PART(p.code, '-', 2), 2, 1) = cn.lettercat",
-            "5. LOST PACKAGES: Use extrastatus = 'lost package' (NOT 'lost')",
-            "6. PAYMENT TOKEN: paymenttokenservice is in mars__revolveclothing_com___db.orders, NOT in ordernumber_rs",
-            "7. TOP PERCENTILES: Use PERCENT_RANK() OVER (ORDER BY metric DESC) <= 0.05 for top 5%",
-            "8. SHIPPING CARRIERS: Use mars__id.shipping_pickuptime for accurate carrier info, not shipment.shippingoption",
-            "9. RANDOM SAMPLING: Use RANDOM() function with ORDER BY for random results",
-            "10. DATE RANGES: Use proper TIMESTAMP filtering with >= and < operators"
-        ]
-
-        return "\n".join(rules)
-
-    def _format_schema_description(self) -> str:
-        """Format schema information for prompts."""
-
-        description = []
-        for table_name, table_info in self.schema_info["tables"].items():
-            columns = []
-            for col in table_info["columns"]:
-                col_desc = f"{col['name']} ({col['type']})"
-                if col.get("primary_key"):
-                    col_desc += " [PRIMARY KEY]"
-                elif col.get("foreign_key"):
-                    col_desc += f" [FOREIGN KEY -> {col['foreign_key']}]"
-                if col.get("description"):
-                    col_desc += f" - {col['description']}"
-                columns.append(col_desc)
-
-            table_desc = f"Table: {table_name}\n"
-            table_desc += f"Description: {table_info['description']}\n"
-            if table_info.get("business_rules"):
-                table_desc += f"Business Rules: {'; '.join(table_info['business_rules'])}\n"
-            table_desc += "Columns:\n" + "\n".join(f"  - {col}" for col in columns)
-            description.append(table_desc)
+        return _BUSINESS_RULES_TEXT
+
+    def _format_schema_description(self, compact: bool = False) -> str:
+        """
+        Format schema information for prompts.
 
-        return "\n\n".join(description)
+        Args:
+            compact: Use one line per table part with short type codes,
+                preceded by a legend, to spend fewer prompt tokens
+        """
+
+        return _render_schema(self._schema_json, compact)
 
     def _format_relationships(self) -> str:
         """Format table relationships for prompts."""
 
-        relationships = []
-        for rel_name, rel_info in self.relationships.items():
-            relationships.append(f"- {rel_name}: {rel_info['condition']} ({rel_info['description']})")
+        return _render_relationships(self._relationships_json)
+
+    @cached_property
+    def _sample_index(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Samples matching each keyword group, built once from the static sample questions."""
 
-        return "\n".join(relationships)
+        lowered = [(sample_info, sample_info["question"].lower()) for sample_info in self.sample_queries.values()]
+        return {
+            group: [sample_info for sample_info, question in lowered
+                    if any(keyword in question for keyword in sample_keywords)]
+            for group, _, sample_keywords in _SAMPLE_KEYWORD_GROUPS
+        }
 
     def _get_relevant_sample_sql(self, user_question: str) -> str:
-        """Get relevant sample SQL based on user question keywords."""
+        """Get relevant sample SQL, reusing the block chosen for an equivalent question."""
+
+        key = canonicalize_question(user_question)
+        with self._sample_sql_lock:
+            if key in self._sample_sql_cache:
+                self._sample_sql_cache.move_to_end(key)
+                return self._sample_sql_cache[key]
+
+        sample_sql = self._select_sample_sql(user_question)
+        with self._sample_sql_lock:
+            self._sample_sql_cache[key] = sample_sql
+            while len(self._sample_sql_cache) > _SAMPLE_SQL_MAX_CACHED:
+                self._sample_sql_cache.popitem(last=False)
+        return sample_sql
+
+    def _select_sample_sql(self, user_question: str) -> str:
+        """Format the samples whose keywords match the question."""
 
-        question_lower = user_question.lower()
         relevant_samples = []
 
         # Enhanced keyword matching for client's business context
-        for sample_name, sample_info in self.sample_queries.items():
-            sample_keywords = sample_info["question"].lower()
-
-            # Check for various business question patterns
-            if any(keyword in question_lower for keyword in ["aov", "average order", "order value"]):
-                if "aov" in sample_keywords or "order" in sample_keywords:
-                    relevant_samples.append(sample_info)
-            elif any(keyword in question_lower for keyword in ["high value", "top customer", "percentile"]):
-                if "high value" in sample_keywords or "percentile" in sample_keywords:
-                    relevant_samples.append(sample_info)
-            elif any(keyword in question_lower for keyword in ["payment", "anet", "applepay"]):
-                if "anet" in sample_keywords or "payment" in sample_keywords:
-                    relevant_samples.append(sample_info)
-            elif any(keyword in question_lower for keyword in ["loss", "shipping", "carrier", "ups", "ontrac"]):
-                if "loss" in sample_keywords or "shipping" in sample_keywords:
-                    relevant_samples.append(sample_info)
-            elif any(keyword in question_lower for keyword in ["random", "sample", "survey"]):
-                if "random" in sample_keywords or "sample" in sample_keywords:
-                    relevant_samples.append(sample_info)
-            elif any(keyword in question_lower for keyword in ["brand", "brands"]):
-                if "brand" in sample_keywords:
-                    relevant_samples.append(sample_info)
-            elif any(keyword in question_lower for keyword in ["category", "categories"]):
-                if "category" in sample_keywords:
-                    relevant_samples.append(sample_info)
+        groups = {match.lastgroup for match in _SAMPLE_TRIGGER_RE.finditer(user_question.lower())}
+        if groups:
+            relevant_samples = self._sample_index[min(groups, key=_SAMPLE_GROUP_PRIORITY.__getitem__)]
 
         if not relevant_samples:
             # Return first two samples as examples
@@ -165,4 +332,9 @@ Generate a syntactically and semantically correct Redshift SQL query following t
         for sample in relevant_samples:
             formatted_samples.append(f"Question: {sample['question']}\nSQL: {sample['sql']}\nExplanation: {sample['explanation']}")
 
-        return "\n\n".join(formatted_samples)
\ No newline at end of file
+        return "\n\n".join(formatted_samples)
+
+    def get_demo_questions(self) -> List[str]:
+        """Get example questions covering the client's main use cases."""
+
+        return list(_DEMO_QUESTIONS)
@@ -2,72 +2,63 @@
 Integration Tools for Redshift connectivity through GCP Integration Connectors.
 """
 
-from google.adk.tools.application_integration_tool.application_integration_toolset import ApplicationIntegrationToolset
+import asyncio
+import atexit
+import hashlib
+import inspect
 import json
+import logging
 import os
+import re
+import textwrap
+import threading
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Tuple
 
+from .serialization import fast_loads
 
-def create_redshift_tool(project_id: str, location: str = "us-central1",
-                        connection: str = "redshift-demo-connection",
-                        service_account_json_path: str = "../config/service_account.json"):
-    """
-    Creates ApplicationIntegrationToolset for Redshift database operations.
-    Updated to follow ADK best practices and client's actual schema.
+if TYPE_CHECKING:
+    from google.adk.tools.application_integration_tool.application_integration_toolset import ApplicationIntegrationToolset
 
-    Args:
-        project_id: GCP project ID
-        location: GCP region (default: us-central1)
-        connection: Integration connector name
-        service_account_json_path: Path to service account JSON file
+logger = logging.getLogger(__name__)
 
-    Returns:
-        ApplicationIntegrationToolset configured for Redshift
 
-    Raises:
-        ValueError: If required configuration is missing
-        FileNotFoundError: If service account file is required but not found
-    """
+# Upper bound on rows returned by ad-hoc queries. The connector returns the
+# whole result set in a single tool response, so unbounded SELECTs on the
+# large order/shipment tables inflate memory and parsing time. Enforced on
+# every custom query by limit_query_rows.
+MAX_RESULT_ROWS = 1000
 
-    # Validate required parameters
-    if not project_id:
-        raise ValueError("project_id is required")
-    if not connection:
-        raise ValueError("connection name is required")
+# A LIMIT (with optional OFFSET) closing the statement, and the statements it
+# applies to (a set operation may open with a parenthesized SELECT)
+_TRAILING_LIMIT_RE = re.compile(r"\bLIMIT\s+(\d+)(\s+OFFSET\s+\d+)?\s*$", re.IGNORECASE)
+_ROW_QUERY_RE = re.compile(r"^[\s(]*(?:SELECT|WITH)\b", re.IGNORECASE)
 
-    # Load service account credentials with better error handling
-    service_account_json = None
-    if os.path.exists(service_account_json_path):
-        try:
-            with open(service_account_json_path, 'r') as f:
-                service_account_json = json.load(f)
-            print(f"✓ Service account loaded from {service_account_json_path}")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in service account file: {e}")
-        except Exception as e:
-            raise FileNotFoundError(f"Could not load service account file: {e}")
-    else:
-        # Try to get credentials from environment
-        if os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
-            print("✓ Using GOOGLE_APPLICATION_CREDENTIALS from environment")
-        else:
-            print("⚠ No service account file or GOOGLE_APPLICATION_CREDENTIALS found")
-            print("⚠ Relying on default GCP authentication")
-
-    # Update entity operations to match client's actual schema
-    entity_operations = {
-        # Primary reporting tables
-        "ordernumber": ["LIST", "GET"],
-        "shipmentnumber": ["LIST", "GET"],
-        # Supporting tables for joins
-        "orders": ["LIST", "GET"],
-        "product": ["LIST", "GET"],
-        "shipment": ["LIST", "GET"],
-        "categorynames": ["LIST", "GET"],
-        "shipping_pickuptime": ["LIST", "GET"]
-    }
+# Live toolsets shared by every agent in the process, keyed by
+# (project_id, location, connection, credentials fingerprint). Reusing a toolset
+# keeps its connector client and authenticated HTTP connections open; rotated
+# credentials change the fingerprint and get a new toolset.
+_TOOLSET_CACHE: Dict[Tuple[str, str, str, str], "ApplicationIntegrationToolset"] = {}
+_TOOLSET_LOCK = threading.Lock()
+# One lock per key being built, so a slow build only blocks callers that
+# want the same toolset, not lookups of other keys
+_TOOLSET_BUILD_LOCKS: Dict[Tuple[str, str, str, str], threading.Lock] = {}
+
+# Entity operations matching client's actual schema
+_ENTITY_OPERATIONS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    # Primary reporting tables
+    "ordernumber": ("LIST", "GET"),
+    "shipmentnumber": ("LIST", "GET"),
+    # Supporting tables for joins
+    "orders": ("LIST", "GET"),
+    "product": ("LIST", "GET"),
+    "shipment": ("LIST", "GET"),
+    "categorynames": ("LIST", "GET"),
+    "shipping_pickuptime": ("LIST", "GET")
+})
 
-    # Enhanced tool instructions with client's business rules
-    tool_instructions = f"""
+# Enhanced tool instructions with client's business rules
+_REDSHIFT_TOOL_INSTRUCTIONS = f"""
     Execute SQL queries on AWS Redshift database through GCP Integration Connector.
     Specialized for Revolve's e-commerce data analysis.
 
@@ -95,7 +86,7 @@ def create_redshift_tool(project_id: str, location: str = "us-central1",
     4. CATEGORY MAPPING: Use SUBSTRING(SPLIT_PART(p.code, '-', 2), 2, 1) = cn.lettercat
     5. LOST PACKAGES: Use extrastatus = 'lost package' (NOT 'lost')
     6. PAYMENT TOKENS: paymenttokenservice is in mars__revolveclothing_com___db.orders
-    7. TOP PERCENTILES: Use PERCENT_RANK() for percentage-based calculations
+    7. TOP PERCENTILES: Use a PERCENTILE_CONT() threshold for top-N% filters (no window functions in HAVING)
     8. SHIPPING CARRIERS: Use mars__id.shipping_pickuptime for accurate info
     9. RANDOM SAMPLING: Use RANDOM() function with ORDER BY
     10. DATE FILTERING: Use proper TIMESTAMP comparisons with >= and < operators
@@ -105,25 +96,133 @@ def create_redshift_tool(project_id: str, location: str = "us-central1",
     - Always use fully qualified table names (schema.table_name)
     - Follow Redshift SQL syntax and data types
     - Include proper error handling for query execution
+    - Queries return at most {MAX_RESULT_ROWS} rows; a larger or missing LIMIT is capped at
+      {MAX_RESULT_ROWS}, so aggregate in SQL rather than fetching raw rows
+    - Do NOT introspect tables or columns per question (information_schema, svv_table_info,
+      pg_table_def); the schema is provided in the agent instructions
+    """
+
+# Parsed service account files, keyed by (real path, modification time)
+_SERVICE_ACCOUNT_CACHE: Dict[Tuple[str, int], Dict[str, Any]] = {}
+_SERVICE_ACCOUNT_LOCK = threading.Lock()
+
+
+def _dedent_sql(sql: str) -> str:
+    """Sample SQL without the indentation and blank lines of its source literal."""
+    return textwrap.dedent(sql).strip()
+
+
+def _freeze(value: Any) -> Any:
+    """Read-only copy of JSON-like data: dicts become mapping proxies, lists tuples."""
+
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def create_redshift_tool(project_id: str, location: str = "us-central1",
+                        connection: str = "redshift-demo-connection",
+                        service_account_json_path: str = "../config/service_account.json"):
+    """
+    Creates ApplicationIntegrationToolset for Redshift database operations.
+    Updated to follow ADK best practices and client's actual schema.
+
+    Args:
+        project_id: GCP project ID
+        location: GCP region (default: us-central1)
+        connection: Integration connector name
+        service_account_json_path: Path to service account JSON file
+
+    Returns:
+        ApplicationIntegrationToolset configured for Redshift
+
+    Raises:
+        ValueError: If required configuration is missing
+        FileNotFoundError: If service account file is required but not found
     """
 
+    # Validate required parameters
+    if not project_id:
+        raise ValueError("project_id is required")
+    if not connection:
+        raise ValueError("connection name is required")
+
+    service_account_json = None
+    if os.path.exists(service_account_json_path):
+        service_account_json = _load_service_account(service_account_json_path)
+
+    cache_key = (project_id, location, connection, _credentials_fingerprint(service_account_json))
+    with _TOOLSET_LOCK:
+        redshift_tool = _TOOLSET_CACHE.get(cache_key)
+        build_lock = _TOOLSET_BUILD_LOCKS.setdefault(cache_key, threading.Lock())
+    if redshift_tool is not None:
+        logger.debug("Reusing ApplicationIntegrationToolset for connection: %s", connection)
+        return redshift_tool
+
+    with build_lock:
+        # Another caller may have built it while we waited
+        with _TOOLSET_LOCK:
+            redshift_tool = _TOOLSET_CACHE.get(cache_key)
+        if redshift_tool is None:
+            redshift_tool = _build_redshift_toolset(project_id, location, connection,
+                                                    service_account_json, service_account_json_path)
+            with _TOOLSET_LOCK:
+                _TOOLSET_CACHE[cache_key] = redshift_tool
+        return redshift_tool
+
+
+def clear_toolset_cache() -> None:
+    """Forget cached toolsets so the next call builds new ones (toolsets already returned keep working)."""
+
+    with _TOOLSET_LOCK:
+        _TOOLSET_CACHE.clear()
+
+
+def _credentials_fingerprint(service_account_json: Optional[Dict[str, Any]]) -> str:
+    """Stable digest of the service account content ("" when using default credentials)."""
+
+    if service_account_json is None:
+        return ""
+    payload = json.dumps(service_account_json, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _build_redshift_toolset(project_id: str, location: str, connection: str,
+                            service_account_json: Optional[Dict[str, Any]],
+                            service_account_json_path: str) -> "ApplicationIntegrationToolset":
+    """Construct a new ApplicationIntegrationToolset for the given connector."""
+
+    # Imported here so schema and sample helpers don't load the ADK toolset stack
+    from google.adk.tools.application_integration_tool.application_integration_toolset import ApplicationIntegrationToolset
+
+    if service_account_json is not None:
+        logger.debug("Service account loaded from %s", service_account_json_path)
+    else:
+        # Try to get credentials from environment
+        if os.environ.get("GOOGLE_APPLICATION_CREDENTIALS"):
+            logger.debug("Using GOOGLE_APPLICATION_CREDENTIALS from environment")
+        else:
+            logger.warning("No service account file or GOOGLE_APPLICATION_CREDENTIALS found; "
+                           "relying on default GCP authentication")
+
     try:
         # Create the toolset for Redshift operations
         redshift_tool = ApplicationIntegrationToolset(
             project=project_id,
             location=location,
             connection=connection,
-            entity_operations=entity_operations,
+            # Plain dict, in case the toolset modifies what it is given
+            entity_operations=dict(_ENTITY_OPERATIONS),
             actions=["ExecuteCustomQuery"],
             service_account_json=service_account_json,
             tool_name_prefix="redshift",
-            tool_instructions=tool_instructions
+            tool_instructions=_REDSHIFT_TOOL_INSTRUCTIONS
         )
 
-        print(f"✓ ApplicationIntegrationToolset created successfully")
-        print(f"  Project: {project_id}")
-        print(f"  Location: {location}")
-        print(f"  Connection: {connection}")
+        logger.debug("ApplicationIntegrationToolset created (project: %s, location: %s, connection: %s)",
+                     project_id, location, connection)
 
         return redshift_tool
 
@@ -131,278 +230,485 @@ def create_redshift_tool(project_id: str, location: str = "us-central1",
         raise RuntimeError(f"Failed to create ApplicationIntegrationToolset: {e}")
 
 
-def create_schema_tool():
+def _load_service_account(path: str) -> Dict[str, Any]:
     """
-    Creates schema tool for client's actual Redshift tables.
-    Based on bi_report.ordernumber_rs and bi_report.shipmentnumber_rs.
+    Parse a service account file, reusing the result until the file changes.
+
+    Raises:
+        ValueError: If the file is not valid JSON
+        FileNotFoundError: If the file cannot be read
     """
 
-    schema_info = {
-        "database": "revolve_redshift",
-        "schema": "bi_report",
-        "tables": {
-            "bi_report.ordernumber_rs": {
-                "columns": [
-                    {"name": "useremail", "type": "VARCHAR(256)", "description": "Customer email address"},
-                    {"name": "transactionid", "type": "VARCHAR(256)", "description": "Unique transaction identifier"},
-                    {"name": "site", "type": "VARCHAR(5)", "description": "Site identifier (R=Revolve, F=Forward)"},
-                    {"name": "shipcountry", "type": "VARCHAR(256)", "description": "Shipping country"},
-                    {"name": "oorderdate", "type": "TIMESTAMP", "description": "Order date"},
-                    {"name": "ssales", "type": "DOUBLE PRECISION", "description": "Sales amount"},
-                    {"name": "netsales", "type": "DOUBLE PRECISION", "description": "Net sales amount"},
-                    {"name": "invoicenum", "type": "VARCHAR(256)", "description": "Invoice number"},
-                    {"name": "paymenttype", "type": "VARCHAR(255)", "description": "Payment method (ANET, etc.)"}
-                ],
-                "description": "Order-level data from Revolve/Forward transactions",
-                "business_rules": [
-                    "Revolve orders: site <> 'F' (excludes Forward)",
-                    "Does NOT contain product-level information",
-                    "Contains payment information but not paymenttokenservice"
-                ]
-            },
-            "bi_report.shipmentnumber_rs": {
-                "columns": [
-                    {"name": "useremail", "type": "VARCHAR(256)", "description": "Customer email address"},
-                    {"name": "transactionid", "type": "VARCHAR(256)", "description": "Transaction identifier"},
-                    {"name": "shipmentid", "type": "VARCHAR(256)", "description": "Unique shipment identifier"},
-                    {"name": "site", "type": "VARCHAR(256)", "description": "Site identifier"},
-                    {"name": "oorderdate", "type": "TIMESTAMP", "description": "Original order date"},
-                    {"name": "shipmentdate", "type": "TIMESTAMP", "description": "Shipment date"},
-                    {"name": "amount", "type": "DOUBLE PRECISION", "description": "Shipment amount"},
-                    {"name": "ssales", "type": "REAL", "description": "Shipment sales"},
-                    {"name": "netsales", "type": "REAL", "description": "Net sales from shipment"},
-                    {"name": "productcode", "type": "VARCHAR(256)", "description": "Product code"},
-                    {"name": "projnetsales_shipped", "type": "REAL", "description": "Projected net sales for shipped items"},
-                    {"name": "extrastatus", "type": "VARCHAR(256)", "description": "Extra status including 'lost package'"},
-                    {"name": "shippingcountry", "type": "VARCHAR(256)", "description": "Shipping country"}
-                ],
-                "description": "Shipment-level data with product information",
-                "business_rules": [
-                    "Contains product codes for joining with product tables",
-                    "Has projected sales calculations",
-                    "extrastatus contains 'lost package' not 'lost'",
-                    "Links to mars__revolveclothing_com___db.orders for additional data"
-                ]
-            },
-            "mars__revolveclothing_com___db.orders": {
-                "columns": [
-                    {"name": "transactionid", "type": "VARCHAR", "description": "Transaction identifier for joining"},
-                    {"name": "paymenttokenservice", "type": "VARCHAR", "description": "Payment token service (ApplePay, etc.)"},
-                    {"name": "amount", "type": "DECIMAL", "description": "Order amount"}
-                ],
-                "description": "Raw orders table with payment token information"
-            },
-            "mars__revolveclothing_com___db.product": {
-                "columns": [
-                    {"name": "code", "type": "VARCHAR", "description": "Product code (matches shipmentnumber_rs.productcode)"},
-                    {"name": "brandname", "type": "VARCHAR", "description": "Brand name"}
-                ],
-                "description": "Product information table"
-            },
-            "mars__revolveclothing_com___db.shipment": {
-                "columns": [
-                    {"name": "shipmentid", "type": "VARCHAR", "description": "Shipment identifier"},
-                    {"name": "extrastatus", "type": "VARCHAR", "description": "Extra status with 'lost package'"},
-                    {"name": "shippingoption", "type": "VARCHAR", "description": "Shipping carrier"},
-                    {"name": "sigrequired", "type": "BOOLEAN", "description": "Signature required flag"}
-                ],
-                "description": "Detailed shipment information"
-            },
-            "mars__id.id_categorynames2": {
-                "columns": [
-                    {"name": "lettercat", "type": "VARCHAR(1)", "description": "Category letter code"},
-                    {"name": "catname2", "type": "VARCHAR", "description": "Category name"}
-                ],
-                "description": "Category mapping table"
-            },
-            "mars__id.shipping_pickuptime": {
-                "columns": [
-                    {"name": "shippingoption", "type": "VARCHAR", "description": "More accurate shipping carrier info"}
-                ],
-                "description": "Shipping carrier information"
-            }
-        }
-    }
+    try:
+        real_path = os.path.realpath(path)
+        cache_key = (real_path, os.stat(real_path).st_mtime_ns)
+        with _SERVICE_ACCOUNT_LOCK:
+            if cache_key in _SERVICE_ACCOUNT_CACHE:
+                return _SERVICE_ACCOUNT_CACHE[cache_key]
+
+        with open(real_path, 'rb') as f:
+            service_account = fast_loads(f.read())
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON in service account file: {e}")
+    except Exception as e:
+        raise FileNotFoundError(f"Could not load service account file: {e}")
+
+    with _SERVICE_ACCOUNT_LOCK:
+        # Forget earlier versions of the same file
+        for stale_key in [key for key in _SERVICE_ACCOUNT_CACHE if key[0] == real_path]:
+            del _SERVICE_ACCOUNT_CACHE[stale_key]
+        _SERVICE_ACCOUNT_CACHE[cache_key] = service_account
+    return service_account
 
-    return schema_info
 
+@atexit.register
+def _close_toolsets() -> None:
+    """Close cached toolsets (and their HTTP sessions) at interpreter exit."""
 
-def get_table_relationships():
+    with _TOOLSET_LOCK:
+        toolsets = list(_TOOLSET_CACHE.values())
+        _TOOLSET_CACHE.clear()
+
+    for toolset in toolsets:
+        close = getattr(toolset, "close", None)
+        if close is None:
+            continue
+        try:
+            outcome = close()
+            if inspect.isawaitable(outcome):
+                asyncio.run(outcome)
+        except Exception as e:
+            logger.debug("Could not close toolset %r: %s", toolset, e)
+
+
+def _last_statement_span(sql: str) -> Optional[Tuple[int, int]]:
     """
-    Returns information about table relationships for JOIN operations.
-    Based on client's actual Redshift schema.
+    Locate the last statement in ``sql``.
+
+    Returns the (start, end) offsets of its code, leaving out surrounding
+    whitespace, -- and /* */ comments and semicolons. Comment markers and
+    semicolons inside string literals or quoted identifiers are ignored.
+    Returns None if there is no statement or a quote or comment is left open.
+    """
+
+    span = None
+    start = end = None
+    i, length = 0, len(sql)
+    while i < length:
+        char = sql[i]
+        if char in "'\"":
+            close = i
+            while True:
+                close = sql.find(char, close + 1)
+                if close == -1:
+                    return None
+                # A doubled quote is an escaped quote, not the closing one
+                if not sql.startswith(char, close + 1):
+                    break
+                close += 1
+            if start is None:
+                start = i
+            end = i = close + 1
+        elif sql.startswith("--", i):
+            newline = sql.find("\n", i)
+            i = length if newline == -1 else newline + 1
+        elif sql.startswith("/*", i):
+            close = sql.find("*/", i + 2)
+            if close == -1:
+                return None
+            i = close + 2
+        elif char == ";":
+            if start is not None:
+                span = (start, end)
+            start = end = None
+            i += 1
+        else:
+            if not char.isspace():
+                if start is None:
+                    start = i
+                end = i + 1
+            i += 1
+
+    if start is not None:
+        span = (start, end)
+    return span
+
+
+def enforce_row_limit(sql: str, max_rows: int = MAX_RESULT_ROWS) -> str:
+    """
+    Cap a SELECT (or WITH ... SELECT) statement at ``max_rows`` rows.
+
+    A closing LIMIT larger than ``max_rows`` is lowered; a statement without
+    one gets ``LIMIT max_rows`` appended. When ``sql`` holds several
+    statements (e.g. a SET before the query), only the last one is capped.
+    Trailing comments and semicolons are dropped. Other statements are
+    returned unchanged.
+
+    Args:
+        sql: SQL statement(s), optionally with comments and semicolons
+        max_rows: Most rows the statement may return
+
+    Returns:
+        The SQL with the row count of its last statement capped
     """
 
-    relationships = {
-        "shipment_to_product": {
-            "type": "INNER JOIN",
-            "condition": "sn.productcode = UPPER(TRIM(p.code))",
-            "description": "Links shipments to product details (productcode matching)"
+    span = _last_statement_span(sql)
+    if span is None:
+        return sql
+
+    start, end = span
+    statement = sql[start:end]
+    if not _ROW_QUERY_RE.match(statement):
+        return sql
+
+    # Earlier statements and the comments leading into this one are kept
+    prefix = sql[:start]
+    match = _TRAILING_LIMIT_RE.search(statement)
+    if match is None:
+        return f"{prefix}{statement}\nLIMIT {max_rows}"
+    if int(match.group(1)) <= max_rows:
+        return prefix + statement
+    return f"{prefix}{statement[:match.start(1)]}{max_rows}{statement[match.end(1):]}"
+
+
+def limit_query_rows(tool: Any, args: Dict[str, Any], tool_context: Any) -> Optional[Dict[str, Any]]:
+    """
+    ADK ``before_tool_callback`` that applies MAX_RESULT_ROWS to custom queries.
+
+    Rewrites the query argument in place and returns None, so the tool call
+    goes ahead with the capped query.
+    """
+
+    query = args.get("query")
+    if getattr(tool, "name", "").endswith("execute_custom_query") and isinstance(query, str):
+        capped = enforce_row_limit(query)
+        if capped != query:
+            logger.debug("Capped custom query at %s rows", MAX_RESULT_ROWS)
+            args["query"] = capped
+    return None
+
+
+# Client table definitions, built once and shared read-only
+_SCHEMA_INFO = _freeze({
+    "database": "revolve_redshift",
+    "schema": "bi_report",
+    "tables": {
+        "bi_report.ordernumber_rs": {
+            "columns": [
+                {"name": "useremail", "type": "VARCHAR(256)", "description": "Customer email address"},
+                {"name": "transactionid", "type": "VARCHAR(256)", "description": "Unique transaction identifier"},
+                {"name": "site", "type": "VARCHAR(5)", "description": "Site identifier (R=Revolve, F=Forward)"},
+                {"name": "shipcountry", "type": "VARCHAR(256)", "description": "Shipping country"},
+                {"name": "oorderdate", "type": "TIMESTAMP", "description": "Order date"},
+                {"name": "ssales", "type": "DOUBLE PRECISION", "description": "Sales amount"},
+                {"name": "netsales", "type": "DOUBLE PRECISION", "description": "Net sales amount"},
+                {"name": "invoicenum", "type": "VARCHAR(256)", "description": "Invoice number"},
+                {"name": "paymenttype", "type": "VARCHAR(255)", "description": "Payment method (ANET, etc.)"}
+            ],
+            "description": "Order-level data from Revolve/Forward transactions",
+            "business_rules": [
+                "Revolve orders: site <> 'F' (excludes Forward)",
+                "Does NOT contain product-level information",
+                "Contains payment information but not paymenttokenservice"
+            ]
         },
-        "shipment_to_orders": {
-            "type": "INNER JOIN",
-            "condition": "sn.transactionid = o.transactionid",
-            "description": "Links shipments to order payment information"
+        "bi_report.shipmentnumber_rs": {
+            "columns": [
+                {"name": "useremail", "type": "VARCHAR(256)", "description": "Customer email address"},
+                {"name": "transactionid", "type": "VARCHAR(256)", "description": "Transaction identifier"},
+                {"name": "shipmentid", "type": "VARCHAR(256)", "description": "Unique shipment identifier"},
+                {"name": "site", "type": "VARCHAR(256)", "description": "Site identifier"},
+                {"name": "oorderdate", "type": "TIMESTAMP", "description": "Original order date"},
+                {"name": "shipmentdate", "type": "TIMESTAMP", "description": "Shipment date"},
+                {"name": "amount", "type": "DOUBLE PRECISION", "description": "Shipment amount"},
+                {"name": "ssales", "type": "REAL", "description": "Shipment sales"},
+                {"name": "netsales", "type": "REAL", "description": "Net sales from shipment"},
+                {"name": "productcode", "type": "VARCHAR(256)", "description": "Product code"},
+                {"name": "projnetsales_shipped", "type": "REAL", "description": "Projected net sales for shipped items"},
+                {"name": "extrastatus", "type": "VARCHAR(256)", "description": "Extra status including 'lost package'"},
+                {"name": "shippingcountry", "type": "VARCHAR(256)", "description": "Shipping country"}
+            ],
+            "description": "Shipment-level data with product information",
+            "business_rules": [
+                "Contains product codes for joining with product tables",
+                "Has projected sales calculations",
+                "extrastatus contains 'lost package' not 'lost'",
+                "Links to mars__revolveclothing_com___db.orders for additional data"
+            ]
         },
-        "shipment_to_detailed_shipment": {
-            "type": "INNER JOIN",
-            "condition": "sn.shipmentid = s.shipmentid",
-            "description": "Links shipment summary to detailed shipment info"
+        "mars__revolveclothing_com___db.orders": {
+            "columns": [
+                {"name": "transactionid", "type": "VARCHAR", "description": "Transaction identifier for joining"},
+                {"name": "paymenttokenservice", "type": "VARCHAR", "description": "Payment token service (ApplePay, etc.)"},
+                {"name": "amount", "type": "DECIMAL", "description": "Order amount"}
+            ],
+            "description": "Raw orders table with payment token information"
         },
-        "product_to_category": {
-            "type": "INNER JOIN",
-            "condition": "SUBSTRING(SPLIT_PART(p.code, '-', 2), 2, 1) = cn.lettercat",
-            "description": "Maps product codes to category names via letter codes"
+        "mars__revolveclothing_com___db.product": {
+            "columns": [
+                {"name": "code", "type": "VARCHAR", "description": "Product code (matches shipmentnumber_rs.productcode)"},
+                {"name": "brandname", "type": "VARCHAR", "description": "Brand name"}
+            ],
+            "description": "Product information table"
         },
-        "ordernumber_to_orders": {
-            "type": "INNER JOIN",
-            "condition": "on.transactionid = o.transactionid",
-            "description": "Links order summaries to raw order data for payment info"
+        "mars__revolveclothing_com___db.shipment": {
+            "columns": [
+                {"name": "shipmentid", "type": "VARCHAR", "description": "Shipment identifier"},
+                {"name": "extrastatus", "type": "VARCHAR", "description": "Extra status with 'lost package'"},
+                {"name": "shippingoption", "type": "VARCHAR", "description": "Shipping carrier"},
+                {"name": "sigrequired", "type": "BOOLEAN", "description": "Signature required flag"}
+            ],
+            "description": "Detailed shipment information"
+        },
+        "mars__id.id_categorynames2": {
+            "columns": [
+                {"name": "lettercat", "type": "VARCHAR(1)", "description": "Category letter code"},
+                {"name": "catname2", "type": "VARCHAR", "description": "Category name"}
+            ],
+            "description": "Category mapping table"
+        },
+        "mars__id.shipping_pickuptime": {
+            "columns": [
+                {"name": "shippingoption", "type": "VARCHAR", "description": "More accurate shipping carrier info"}
+            ],
+            "description": "Shipping carrier information"
         }
     }
+})
 
-    return relationships
 
+def create_schema_tool() -> Mapping[str, Any]:
+    """
+    Creates schema tool for client's actual Redshift tables.
+    Based on bi_report.ordernumber_rs and bi_report.shipmentnumber_rs.
 
-def get_sample_queries():
+    The definition is built once at import and shared read-only; build a
+    plain copy before modifying it.
     """
-    Returns sample queries based on client's actual business questions.
-    These correct the issues found in the test document.
+
+    return _SCHEMA_INFO
+
+
+# JOIN conditions between the client tables
+_TABLE_RELATIONSHIPS = _freeze({
+    "shipment_to_product": {
+        "type": "INNER JOIN",
+        "condition": "sn.productcode = UPPER(TRIM(p.code))",
+        "description": "Links shipments to product details (productcode matching)"
+    },
+    "shipment_to_orders": {
+        "type": "INNER JOIN",
+        "condition": "sn.transactionid = o.transactionid",
+        "description": "Links shipments to order payment information"
+    },
+    "shipment_to_detailed_shipment": {
+        "type": "INNER JOIN",
+        "condition": "sn.shipmentid = s.shipmentid",
+        "description": "Links shipment summary to detailed shipment info"
+    },
+    "product_to_category": {
+        "type": "INNER JOIN",
+        "condition": "SUBSTRING(SPLIT_PART(p.code, '-', 2), 2, 1) = cn.lettercat",
+        "description": "Maps product codes to category names via letter codes"
+    },
+    "ordernumber_to_orders": {
+        "type": "INNER JOIN",
+        "condition": "on.transactionid = o.transactionid",
+        "description": "Links order summaries to raw order data for payment info"
+    }
+})
+
+
+def get_table_relationships() -> Mapping[str, Any]:
+    """
+    Returns information about table relationships for JOIN operations.
+    Based on client's actual Redshift schema. Shared read-only, like
+    create_schema_tool().
     """
 
-    samples = {
-        "revolve_orders_aov_by_category": {
-            "question": "Show me the number of Revolve orders and AOV for United Kingdom between date ranges, split by Category",
-            "sql": """
-            SELECT
-              CASE
-                WHEN t1.oorderdate >= '2022-08-25' AND t1.oorderdate < '2023-08-25' THEN '8/25/22 - 8/24/23'
-                WHEN t1.oorderdate >= '2021-08-25' AND t1.oorderdate < '2022-08-25' THEN '8/25/21 - 8/24/22'
-              END AS period,
-              t4.catname2 AS category,
-              COUNT(DISTINCT t1.transactionid) AS nOrders,
-              AVG(t1.ssales) AS AOV
-            FROM
-              bi_report.shipmentnumber_rs t1
-              INNER JOIN mars__revolveclothing_com___db.product t2 ON t1.productcode = UPPER(TRIM(t2.code))
-              INNER JOIN mars__id.id_categorynames2 t4 ON SUBSTRING(SPLIT_PART(t2.code, '-', 2), 2, 1) = t4.lettercat
-            WHERE
-              t1.oorderdate >= '2021-08-25'
-              AND t1.oorderdate < '2023-08-25'
-              AND t1.site <> 'F'
-              AND t1.shippingcountry = 'United Kingdom'
-            GROUP BY 1, 2
-            ORDER BY 1, 2
-            """,
-            "explanation": "Correct approach: Use shipmentnumber_rs for product-level data, site <> 'F' for Revolve orders"
-        },
-        "high_value_customers_percentile": {
-            "question": "Get top brands and categories based on projected net sales for top 5% high value customers",
-            "sql": """
-            WITH high_value_customers AS (
-              SELECT
-                useremail,
-                SUM(netsales) as total_netsales,
-                PERCENT_RANK() OVER (ORDER BY SUM(netsales) DESC) as percentile_rank
-              FROM
-                bi_report.ordernumber_rs
-              GROUP BY
-                useremail
-              HAVING PERCENT_RANK() OVER (ORDER BY SUM(netsales) DESC) <= 0.05
-            )
-            SELECT
-              p.brandname,
-              cn.catname2,
-              SUM(sn.projnetsales_shipped) AS total_projnetsales
-            FROM
-              bi_report.shipmentnumber_rs sn
-              JOIN high_value_customers hvc ON sn.useremail = hvc.useremail
-              JOIN mars__revolveclothing_com___db.product p ON sn.productcode = UPPER(TRIM(p.code))
-              JOIN mars__id.id_categorynames2 cn ON SUBSTRING(SPLIT_PART(p.code, '-', 2), 2, 1) = cn.lettercat
-            GROUP BY p.brandname, cn.catname2
-            ORDER BY SUM(sn.projnetsales_shipped) DESC
-            LIMIT 10
-            """,
-            "explanation": "Correct approach: Use PERCENT_RANK for top 5% calculation, proper product code mapping"
-        },
-        "anet_transactions_exclude_applepay": {
-            "question": "Show number of transactions and average monthly gross sales through ANET excluding ApplePay",
-            "sql": """
-            SELECT
-              EXTRACT(YEAR FROM on.oorderdate) as year,
-              EXTRACT(MONTH FROM on.oorderdate) as month,
-              COUNT(DISTINCT on.transactionid) AS num_transactions,
-              AVG(on.ssales) AS avg_gross_sales
-            FROM
-              bi_report.ordernumber_rs on
-              INNER JOIN mars__revolveclothing_com___db.orders o ON on.transactionid = o.transactionid
-            WHERE
-              on.paymenttype = 'ANET'
-              AND (o.paymenttokenservice IS NULL OR o.paymenttokenservice != 'ApplePay')
-            GROUP BY 1, 2
-            ORDER BY 1, 2
-            """,
-            "explanation": "Correct approach: Join with orders table to get paymenttokenservice field"
-        },
-        "shipping_loss_rates": {
-            "question": "Analyze Ontrac and UPS loss rates by order value with signature requirements",
-            "sql": """
-            SELECT
-              sp.shippingoption,
-              s.sigrequired,
-              CASE
-                WHEN o.amount <= 100 THEN '0-100'
-                WHEN o.amount <= 200 THEN '101-200'
-                WHEN o.amount <= 300 THEN '201-300'
-                WHEN o.amount <= 400 THEN '301-400'
-                WHEN o.amount <= 500 THEN '401-500'
-                ELSE '501+'
-              END AS value_range,
-              COUNT(*) AS total_shipments,
-              SUM(CASE WHEN s.extrastatus = 'lost package' THEN 1 ELSE 0 END) AS lost_shipments,
-              SUM(CASE WHEN s.extrastatus = 'lost package' THEN 1 ELSE 0 END)::FLOAT / COUNT(*) AS loss_rate
-            FROM
-              bi_report.shipmentnumber_rs sn
-              JOIN mars__revolveclothing_com___db.orders o ON sn.transactionid = o.transactionid
-              JOIN mars__revolveclothing_com___db.shipment s ON sn.shipmentid = s.shipmentid
-              JOIN mars__id.shipping_pickuptime sp ON s.shippingoption = sp.shippingoption
-            WHERE
-              sp.shippingoption IN ('Ontrac', 'UPS')
-            GROUP BY 1, 2, 3
-            ORDER BY 1, 2, 3
-            """,
-            "explanation": "Correct approach: Use 'lost package' status, get accurate shipping info from shipping_pickuptime"
-        },
-        "random_customer_survey": {
-            "question": "Get 5K random REVOLVE customers with last transaction in past 12 months",
-            "sql": """
-            SELECT
-              t1.useremail,
-              t1.site,
-              t1.invoicenum,
-              t1.shipcountry,
-              t1.ssales
-            FROM (
-              SELECT
-                useremail,
-                site,
-                invoicenum,
-                shipcountry,
-                ssales,
-                ROW_NUMBER() OVER (PARTITION BY useremail ORDER BY oorderdate DESC) AS rn,
-                RANDOM() as rand_num
-              FROM
-                bi_report.ordernumber_rs
-              WHERE
-                oorderdate >= (CURRENT_DATE - INTERVAL '12 months')
-                AND site = 'R'
-            ) t1
-            WHERE t1.rn = 1
-            ORDER BY t1.rand_num
-            LIMIT 5000
-            """,
-            "explanation": "Correct approach: Use RANDOM() function for random sampling, get most recent transaction per customer"
-        }
+    return _TABLE_RELATIONSHIPS
+
+
+# Reviewed question/SQL pairs used as few-shot examples. Joins are written
+# starting from the most selectively filtered table, so the plan stays good
+# when table statistics are stale (keep them current with ANALYZE)
+_SAMPLE_QUERIES = _freeze({
+    "revolve_orders_aov_by_category": {
+        "question": "Show me the number of Revolve orders and AOV for United Kingdom between date ranges, split by Category",
+        "sql": _dedent_sql("""
+        WITH uk_revolve_shipments AS (
+          SELECT '8/25/22 - 8/24/23' AS period, transactionid, productcode, ssales
+          FROM bi_report.shipmentnumber_rs
+          WHERE
+            oorderdate >= '2022-08-25'
+            AND oorderdate < '2023-08-25'
+            AND site <> 'F'
+            AND shippingcountry = 'United Kingdom'
+          UNION ALL
+          SELECT '8/25/21 - 8/24/22' AS period, transactionid, productcode, ssales
+          FROM bi_report.shipmentnumber_rs
+          WHERE
+            oorderdate >= '2021-08-25'
+            AND oorderdate < '2022-08-25'
+            AND site <> 'F'
+            AND shippingcountry = 'United Kingdom'
+        ),
+        category_orders AS (
+          SELECT
+            t1.period,
+            t4.catname2 AS category,
+            t1.transactionid,
+            SUM(t1.ssales) AS order_sales
+          FROM
+            uk_revolve_shipments t1
+            INNER JOIN mars__revolveclothing_com___db.product t2 ON t1.productcode = UPPER(TRIM(t2.code))
+            INNER JOIN mars__id.id_categorynames2 t4 ON SUBSTRING(SPLIT_PART(t2.code, '-', 2), 2, 1) = t4.lettercat
+          GROUP BY 1, 2, 3
+        )
+        SELECT
+          period,
+          category,
+          COUNT(*) AS nOrders,
+          AVG(order_sales) AS AOV
+        FROM category_orders
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        """),
+        "explanation": "Correct approach: Use shipmentnumber_rs for product-level data, site <> 'F' for Revolve orders; scan each date range with its own tight filter and UNION ALL them instead of bucketing one wide scan with CASE; roll shipments up to one row per order before counting orders and averaging, so multi-shipment orders are counted once"
+    },
+    "high_value_customers_percentile": {
+        "question": "Get top brands and categories based on projected net sales for top 5% high value customers",
+        "sql": _dedent_sql("""
+        WITH customer_sales AS (
+          SELECT
+            useremail,
+            SUM(netsales) AS total_netsales
+          FROM
+            bi_report.ordernumber_rs
+          GROUP BY
+            useremail
+        ),
+        top_5_percent_threshold AS (
+          SELECT PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY total_netsales) AS min_netsales
+          FROM customer_sales
+        ),
+        high_value_customers AS (
+          SELECT cs.useremail
+          FROM
+            customer_sales cs
+            CROSS JOIN top_5_percent_threshold t
+          WHERE cs.total_netsales >= t.min_netsales
+        )
+        SELECT
+          p.brandname,
+          cn.catname2,
+          SUM(sn.projnetsales_shipped) AS total_projnetsales
+        FROM
+          bi_report.shipmentnumber_rs sn
+          JOIN high_value_customers hvc ON sn.useremail = hvc.useremail
+          JOIN mars__revolveclothing_com___db.product p ON sn.productcode = UPPER(TRIM(p.code))
+          JOIN mars__id.id_categorynames2 cn ON SUBSTRING(SPLIT_PART(p.code, '-', 2), 2, 1) = cn.lettercat
+        GROUP BY p.brandname, cn.catname2
+        ORDER BY SUM(sn.projnetsales_shipped) DESC
+        LIMIT 10
+        """),
+        "explanation": "Correct approach: Compute the 95th-percentile threshold once with PERCENTILE_CONT and keep customers at or above it (window functions are not allowed in HAVING), proper product code mapping"
+    },
+    "anet_transactions_exclude_applepay": {
+        "question": "Show number of transactions and average monthly gross sales through ANET excluding ApplePay",
+        "sql": _dedent_sql("""
+        SELECT
+          EXTRACT(YEAR FROM on.oorderdate) as year,
+          EXTRACT(MONTH FROM on.oorderdate) as month,
+          COUNT(DISTINCT on.transactionid) AS num_transactions,
+          AVG(on.ssales) AS avg_gross_sales
+        FROM
+          bi_report.ordernumber_rs on
+          INNER JOIN mars__revolveclothing_com___db.orders o ON on.transactionid = o.transactionid
+        WHERE
+          on.paymenttype = 'ANET'
+          AND (o.paymenttokenservice IS NULL OR o.paymenttokenservice != 'ApplePay')
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        """),
+        "explanation": "Correct approach: Join with orders table to get paymenttokenservice field"
+    },
+    "shipping_loss_rates": {
+        "question": "Analyze Ontrac and UPS loss rates by order value with signature requirements",
+        "sql": _dedent_sql("""
+        SELECT
+          shippingoption,
+          sigrequired,
+          CASE bucket_id
+            WHEN 0 THEN '0-100'
+            WHEN 1 THEN '101-200'
+            WHEN 2 THEN '201-300'
+            WHEN 3 THEN '301-400'
+            WHEN 4 THEN '401-500'
+            ELSE '501+'
+          END AS value_range,
+          total_shipments,
+          lost_shipments,
+          lost_shipments::FLOAT / total_shipments AS loss_rate
+        FROM (
+          SELECT
+            sp.shippingoption,
+            s.sigrequired,
+            COALESCE(LEAST(5, GREATEST(0, CAST(CEIL(o.amount / 100.0) AS INT) - 1)), 5) AS bucket_id,
+            COUNT(*) AS total_shipments,
+            SUM(CASE WHEN s.extrastatus = 'lost package' THEN 1 ELSE 0 END) AS lost_shipments
+          FROM
+            mars__id.shipping_pickuptime sp
+            JOIN mars__revolveclothing_com___db.shipment s ON s.shippingoption = sp.shippingoption
+            JOIN bi_report.shipmentnumber_rs sn ON sn.shipmentid = s.shipmentid
+            JOIN mars__revolveclothing_com___db.orders o ON o.transactionid = sn.transactionid
+          WHERE
+            sp.shippingoption IN ('Ontrac', 'UPS')
+          GROUP BY 1, 2, 3
+        ) value_buckets
+        ORDER BY 1, 2, bucket_id
+        """),
+        "explanation": "Correct approach: Use 'lost package' status, get accurate shipping info from shipping_pickuptime; start the joins from the carrier filter, the most selective table; group on an integer value bucket and label it only in the outer query; a NULL amount falls in the 501+ bucket, as the ELSE branch of a CASE on the amount would put it"
+    },
+    "random_customer_survey": {
+        "question": "Get 5K random REVOLVE customers with last transaction in past 12 months",
+        "sql": _dedent_sql("""
+        SELECT
+          t1.useremail,
+          t1.site,
+          t1.invoicenum,
+          t1.shipcountry,
+          t1.ssales
+        FROM (
+          SELECT
+            useremail,
+            site,
+            invoicenum,
+            shipcountry,
+            ssales,
+            ROW_NUMBER() OVER (PARTITION BY useremail ORDER BY oorderdate DESC) AS rn,
+            RANDOM() as rand_num
+          FROM
+            bi_report.ordernumber_rs
+          WHERE
+            oorderdate >= (CURRENT_DATE - INTERVAL '12 months')
+            AND site = 'R'
+            AND STRTOL(SUBSTRING(MD5(useremail), 1, 8), 16) % 10000 < 200
+        ) t1
+        WHERE t1.rn = 1
+        ORDER BY t1.rand_num
+        LIMIT 5000
+        """),
+        "explanation": "Correct approach: Use RANDOM() function for random sampling, get most recent transaction per customer; first keep a stable ~2% of customers by MD5 hash of useremail so only that subset is ranked and sorted (raise the 200 if it yields fewer customers than needed)"
     }
+})
+
+
+def get_sample_queries() -> Mapping[str, Any]:
+    """
+    Returns sample queries based on client's actual business questions.
+    These correct the issues found in the test document. Shared read-only,
+    like create_schema_tool().
+    """
 
-    return samples
\ No newline at end of file
+    return _SAMPLE_QUERIES
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""
+Tests for agent helpers that don't need a live ADK agent.
+Run from nl2sql-agent with: python -m unittest discover -s tests -t .
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from my_agent import agent as agent_module
+from my_agent.agent import NL2SQLRedshiftAgent, _parse_batch_response
+from my_agent.cache import ExactResponseCache
+
+
+def _entry(question: str, executed: bool = True, sql: str = "SELECT 1", answer: str = "one") -> dict:
+    return {"question": question, "sql": sql, "executed": executed, "answer": answer}
+
+
+class ParseBatchResponseTest(unittest.TestCase):
+
+    def test_parses_array_surrounded_by_text(self):
+        text = "Here are the results:\n" + json.dumps([_entry("a"), _entry("b")]) + "\nDone."
+        answers = _parse_batch_response(text, 2)
+        self.assertEqual([a["question"] for a in answers], ["a", "b"])
+
+    def test_missing_entries_are_none(self):
+        self.assertEqual(_parse_batch_response(json.dumps([_entry("a")]), 3)[1:], [None, None])
+
+    def test_extra_entries_are_ignored(self):
+        self.assertEqual(len(_parse_batch_response(json.dumps([_entry("a"), _entry("b")]), 1)), 1)
+
+    def test_entries_not_marked_executed_are_rejected(self):
+        text = json.dumps([_entry("a", executed=False), {"question": "b", "sql": "SELECT 1", "answer": "one"},
+                           _entry("c", executed="true")])
+        self.assertEqual(_parse_batch_response(text, 3), [None, None, None])
+
+    def test_entries_without_sql_or_answer_are_rejected(self):
+        text = json.dumps([_entry("a", sql=""), _entry("b", answer=""), "not an object"])
+        self.assertEqual(_parse_batch_response(text, 3), [None, None, None])
+
+    def test_unparseable_text_gives_all_none(self):
+        self.assertEqual(_parse_batch_response("no json here", 2), [None, None])
+        self.assertEqual(_parse_batch_response("[not, valid json]", 2), [None, None])
+        self.assertEqual(_parse_batch_response('{"question": "a"}', 1), [None])
+
+
+class _CachedContent:
+    def __init__(self, remaining: timedelta, fail_update: bool = False):
+        self.resource_name = "cachedContents/test"
+        self.expire_time = datetime.now(timezone.utc) + remaining
+        self.fail_update = fail_update
+        self.updates = 0
+
+    def update(self, ttl: timedelta) -> None:
+        if self.fail_update:
+            raise RuntimeError("cache not found")
+        self.updates += 1
+        self.expire_time = datetime.now(timezone.utc) + ttl
+
+
+class RefreshContextCacheTest(unittest.TestCase):
+
+    def _agent(self, cached_content: _CachedContent) -> NL2SQLRedshiftAgent:
+        # Only the state _refresh_context_cache touches; no ADK or Vertex AI needed
+        agent = NL2SQLRedshiftAgent.__new__(NL2SQLRedshiftAgent)
+        agent.logger = logging.getLogger("test")
+        agent._context_cache_lock = threading.Lock()
+        agent._agent_lock = threading.Lock()
+        agent._agent_instance = object()
+        agent.__dict__["agent"] = agent._agent_instance
+        agent.__dict__["_cached_content"] = cached_content
+        agent_module._CONTEXT_CACHES[("test",)] = cached_content
+        self.addCleanup(agent_module._CONTEXT_CACHES.pop, ("test",), None)
+        return agent
+
+    def _assert_dropped(self, agent: NL2SQLRedshiftAgent) -> None:
+        self.assertNotIn(("test",), agent_module._CONTEXT_CACHES)
+        self.assertNotIn("_cached_content", agent.__dict__)
+        self.assertNotIn("agent", agent.__dict__)
+        self.assertIsNone(agent._agent_instance)
+
+    def test_fresh_cache_is_left_alone(self):
+        cached_content = _CachedContent(timedelta(hours=1))
+        agent = self._agent(cached_content)
+        agent._refresh_context_cache()
+        self.assertEqual(cached_content.updates, 0)
+        self.assertIs(agent.__dict__["_cached_content"], cached_content)
+
+    def test_expiring_cache_is_extended(self):
+        cached_content = _CachedContent(timedelta(minutes=1))
+        agent = self._agent(cached_content)
+        agent._refresh_context_cache()
+        self.assertEqual(cached_content.updates, 1)
+        self.assertIn("agent", agent.__dict__)
+
+    def test_expired_cache_is_dropped_with_the_agent(self):
+        agent = self._agent(_CachedContent(-timedelta(minutes=1)))
+        with self.assertLogs("test", level="WARNING"):
+            agent._refresh_context_cache()
+        self._assert_dropped(agent)
+
+    def test_failed_update_drops_the_cache(self):
+        agent = self._agent(_CachedContent(timedelta(minutes=1), fail_update=True))
+        with self.assertLogs("test", level="WARNING"):
+            agent._refresh_context_cache()
+        self._assert_dropped(agent)
+
+
+class _BrokenDiskCache:
+    def get(self, namespace, question):
+        raise sqlite3.OperationalError("database is locked")
+
+    def put(self, namespace, question, vector, result):
+        raise OSError("disk full")
+
+
+class DiskCacheErrorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.agent = NL2SQLRedshiftAgent.__new__(NL2SQLRedshiftAgent)
+        self.agent.logger = logging.getLogger("test")
+        self.agent.__dict__["_schema_version"] = "v1"
+        self.agent.answer_cache = ExactResponseCache()
+        self.agent.response_cache = None
+        self.agent.disk_cache = _BrokenDiskCache()
+
+    def test_failed_read_is_a_miss(self):
+        with self.assertLogs("test", level="WARNING"):
+            self.assertIsNone(self.agent._get_exact_cached_result("top brands", None))
+
+    def test_failed_write_keeps_the_memory_copy(self):
+        result = {"success": True, "agent_response": "ok"}
+        with self.assertLogs("test", level="WARNING"):
+            self.agent._store_result("top brands", None, None, result)
+        self.agent.disk_cache = None
+        self.assertEqual(self.agent._get_exact_cached_result("top brands", None)["agent_response"], "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+Tests for the response cache helpers.
+Run from nl2sql-agent with: python -m unittest discover -s tests -t .
+"""
+
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from my_agent.cache import (EmbeddingModelUnavailable, ExactResponseCache, PersistentResponseCache, QuestionEmbedder,
+                            SemanticResponseCache, canonicalize_question, normalize_question)
+
+
+class CanonicalizeQuestionTest(unittest.TestCase):
+
+    def test_ignores_case_spacing_and_trailing_punctuation(self):
+        self.assertEqual(canonicalize_question("  Top   Brands by SALES?! "), "top brands by sales")
+
+    def test_drops_filler_words(self):
+        self.assertEqual(canonicalize_question("Please show me the top brands"), "top brands")
+
+    def test_spelled_out_numbers_match_digits(self):
+        self.assertEqual(canonicalize_question("Show me the top five brands?"), canonicalize_question("top 5 brands"))
+
+    def test_number_words_only_replaced_as_whole_words(self):
+        self.assertEqual(canonicalize_question("someone bought often"), "someone bought often")
+
+    def test_different_numbers_stay_distinct(self):
+        self.assertNotEqual(canonicalize_question("top 5 brands in 2023"), canonicalize_question("top 10 brands in 2023"))
+
+    def test_falls_back_to_normalized_question_when_only_filler(self):
+        self.assertEqual(canonicalize_question("Show me the"), normalize_question("Show me the"))
+
+
+class ExactResponseCacheTest(unittest.TestCase):
+
+    def test_hit_and_miss_are_counted(self):
+        cache = ExactResponseCache()
+        cache.put("q", {"answer": 1})
+        self.assertEqual(cache.get("q"), {"answer": 1})
+        self.assertIsNone(cache.get("other"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_entries_expire_after_ttl(self):
+        cache = ExactResponseCache(ttl_seconds=10)
+        with mock.patch("my_agent.cache.time.monotonic", return_value=100.0):
+            cache.put("q", {"answer": 1})
+        with mock.patch("my_agent.cache.time.monotonic", return_value=109.0):
+            self.assertIsNotNone(cache.get("q"))
+        with mock.patch("my_agent.cache.time.monotonic", return_value=110.0):
+            self.assertIsNone(cache.get("q"))
+
+    def test_evicts_least_recently_used(self):
+        cache = ExactResponseCache(max_entries=2)
+        cache.put("a", {"answer": "a"})
+        cache.put("b", {"answer": "b"})
+        cache.get("a")
+        cache.put("c", {"answer": "c"})
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_clear_resets_entries_and_counters(self):
+        cache = ExactResponseCache()
+        cache.put("q", {"answer": 1})
+        cache.get("q")
+        cache.clear()
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+        self.assertIsNone(cache.get("q"))
+
+
+class SemanticResponseCacheTest(unittest.TestCase):
+
+    def test_returns_closest_entry_above_threshold(self):
+        cache = SemanticResponseCache(threshold=0.9)
+        cache.put([1.0, 0.0], "ns", {"answer": "x"})
+        cache.put([0.0, 1.0], "ns", {"answer": "y"})
+        self.assertEqual(cache.get([0.99, 0.1], "ns"), {"answer": "x"})
+        self.assertIsNone(cache.get([0.7, 0.7], "ns"))
+
+    def test_namespaces_are_separate(self):
+        cache = SemanticResponseCache()
+        cache.put([1.0, 0.0], "schema-a:", {"answer": "x"})
+        self.assertIsNone(cache.get([1.0, 0.0], "schema-b:"))
+
+    def test_entries_expire_after_ttl(self):
+        cache = SemanticResponseCache(ttl_seconds=10)
+        with mock.patch("my_agent.cache.time.monotonic", return_value=100.0):
+            cache.put([1.0, 0.0], "ns", {"answer": "x"})
+        with mock.patch("my_agent.cache.time.monotonic", return_value=109.0):
+            self.assertIsNotNone(cache.get([1.0, 0.0], "ns"))
+        with mock.patch("my_agent.cache.time.monotonic", return_value=110.0):
+            self.assertIsNone(cache.get([1.0, 0.0], "ns"))
+
+    def test_evicts_least_recently_used(self):
+        cache = SemanticResponseCache(max_entries=2)
+        cache.put([1.0, 0.0, 0.0], "ns", {"answer": "a"})
+        cache.put([0.0, 1.0, 0.0], "ns", {"answer": "b"})
+        cache.get([1.0, 0.0, 0.0], "ns")
+        cache.put([0.0, 0.0, 1.0], "ns", {"answer": "c"})
+        self.assertIsNone(cache.get([0.0, 1.0, 0.0], "ns"))
+        self.assertEqual(cache.get([1.0, 0.0, 0.0], "ns"), {"answer": "a"})
+
+
+class PersistentResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "nested", "responses.sqlite")
+
+    def _open(self, **kwargs) -> PersistentResponseCache:
+        cache = PersistentResponseCache(self.path, **kwargs)
+        self.addCleanup(cache._conn.close)
+        return cache
+
+    def test_round_trip_survives_reopen(self):
+        result = {"success": True, "agent_response": "42 orders", "response_id": 7}
+        self._open().put("ns", "orders count", [0.25, 0.5, 1.0], result)
+
+        reopened = self._open()
+        self.assertEqual(reopened.get("ns", "orders count"), result)
+        # Embeddings are stored as float32; these values are exact in it
+        self.assertEqual(reopened.get_similar([0.25, 0.5, 1.0], "ns"), result)
+
+    def test_similar_lookup_respects_threshold(self):
+        cache = self._open(threshold=0.99)
+        cache.put("ns", "q", [1.0, 0.0], {"answer": "x"})
+        self.assertIsNotNone(cache.get_similar([1.0, 0.01], "ns"))
+        self.assertIsNone(cache.get_similar([1.0, 1.0], "ns"))
+
+    def test_rows_without_embedding_only_match_exactly(self):
+        cache = self._open()
+        cache.put("ns", "q", None, {"answer": "x"})
+        self.assertEqual(cache.get("ns", "q"), {"answer": "x"})
+        self.assertIsNone(cache.get_similar([1.0, 0.0], "ns"))
+
+    def test_namespaces_are_separate(self):
+        cache = self._open()
+        cache.put("schema-a:", "q", [1.0, 0.0], {"answer": "x"})
+        self.assertIsNone(cache.get("schema-b:", "q"))
+        self.assertIsNone(cache.get_similar([1.0, 0.0], "schema-b:"))
+
+    def test_expired_rows_are_ignored_and_purged_on_open(self):
+        with mock.patch("my_agent.cache.time.time", return_value=1000.0):
+            cache = self._open(ttl_seconds=60)
+            cache.put("ns", "q", [1.0, 0.0], {"answer": "x"})
+        with mock.patch("my_agent.cache.time.time", return_value=1061.0):
+            self.assertIsNone(cache.get("ns", "q"))
+            self.assertIsNone(cache.get_similar([1.0, 0.0], "ns"))
+            self._open(ttl_seconds=60)
+        with mock.patch("my_agent.cache.time.time", return_value=1000.0):
+            self.assertIsNone(cache.get("ns", "q"))
+
+    def test_clear_removes_all_rows(self):
+        cache = self._open()
+        cache.put("ns", "q", None, {"answer": "x"})
+        cache.clear()
+        self.assertIsNone(cache.get("ns", "q"))
+
+
+class QuestionEmbedderTest(unittest.TestCase):
+
+    def test_failed_model_load_is_not_retried(self):
+        vertexai = types.ModuleType("vertexai")
+        vertexai.init = mock.Mock(side_effect=RuntimeError("no credentials"))
+        language_models = types.ModuleType("vertexai.language_models")
+        language_models.TextEmbeddingModel = mock.Mock()
+
+        embedder = QuestionEmbedder("project", "us-central1")
+        with mock.patch.dict(sys.modules, {"vertexai": vertexai, "vertexai.language_models": language_models}):
+            for _ in range(3):
+                with self.assertRaises(EmbeddingModelUnavailable):
+                    embedder.embed(["top brands"])
+
+        self.assertEqual(vertexai.init.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Tests for the row cap applied to custom Redshift queries.
+Run from nl2sql-agent with: python -m unittest discover -s tests -t .
+"""
+
+import unittest
+
+from my_agent.tools import MAX_RESULT_ROWS, enforce_row_limit, limit_query_rows
+
+
+class _Tool:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class EnforceRowLimitTest(unittest.TestCase):
+
+    def test_appends_limit_when_missing(self):
+        self.assertEqual(enforce_row_limit("SELECT * FROM t;"), f"SELECT * FROM t\nLIMIT {MAX_RESULT_ROWS}")
+
+    def test_keeps_smaller_limit(self):
+        self.assertEqual(enforce_row_limit("select * from t LIMIT 10"), "select * from t LIMIT 10")
+
+    def test_lowers_larger_limit_and_keeps_offset(self):
+        self.assertEqual(enforce_row_limit("select * from t limit 5000 offset 20", max_rows=100),
+                         "select * from t limit 100 offset 20")
+
+    def test_with_statement_is_capped(self):
+        self.assertTrue(enforce_row_limit("WITH x AS (SELECT 1) SELECT * FROM x").endswith("\nLIMIT 1000"))
+
+    def test_trailing_comment_does_not_hide_limit(self):
+        self.assertEqual(enforce_row_limit("select 1 limit 9999; -- all rows\n", max_rows=50),
+                         "select 1 limit 50")
+
+    def test_dashes_in_string_literal_are_kept(self):
+        sql = "select * from t where code = 'a--b'"
+        self.assertEqual(enforce_row_limit(sql, max_rows=5), f"{sql}\nLIMIT 5")
+
+    def test_quote_in_trailing_comment_does_not_hide_limit(self):
+        self.assertEqual(enforce_row_limit("SELECT * FROM t LIMIT 10 -- customer's last order"),
+                         "SELECT * FROM t LIMIT 10")
+
+    def test_trailing_block_comment_does_not_hide_limit(self):
+        self.assertEqual(enforce_row_limit("SELECT * FROM t LIMIT 10 /* top */"), "SELECT * FROM t LIMIT 10")
+
+    def test_leading_comment_is_kept(self):
+        self.assertEqual(enforce_row_limit("-- top brands\nSELECT * FROM t", max_rows=5),
+                         "-- top brands\nSELECT * FROM t\nLIMIT 5")
+
+    def test_parenthesized_set_operation_is_capped(self):
+        self.assertEqual(enforce_row_limit("(SELECT 1) UNION (SELECT 2)", max_rows=5),
+                         "(SELECT 1) UNION (SELECT 2)\nLIMIT 5")
+
+    def test_last_of_several_statements_is_capped(self):
+        self.assertEqual(enforce_row_limit("SET wlm_query_slot_count TO 3;\nSELECT * FROM t", max_rows=5),
+                         "SET wlm_query_slot_count TO 3;\nSELECT * FROM t\nLIMIT 5")
+
+    def test_semicolon_in_string_literal_is_not_a_separator(self):
+        sql = "select * from t where note = 'a; it''s -- fine'"
+        self.assertEqual(enforce_row_limit(sql, max_rows=5), f"{sql}\nLIMIT 5")
+
+    def test_unterminated_quote_is_unchanged(self):
+        self.assertEqual(enforce_row_limit("select 'abc"), "select 'abc")
+
+    def test_non_select_statement_is_unchanged(self):
+        self.assertEqual(enforce_row_limit("UPDATE t SET a = 1"), "UPDATE t SET a = 1")
+
+    def test_non_select_last_statement_is_unchanged(self):
+        sql = "SELECT 1; DELETE FROM t"
+        self.assertEqual(enforce_row_limit(sql), sql)
+
+
+class LimitQueryRowsTest(unittest.TestCase):
+
+    def test_rewrites_custom_query_args(self):
+        args = {"query": "select * from t"}
+        self.assertIsNone(limit_query_rows(_Tool("redshift_execute_custom_query"), args, None))
+        self.assertEqual(args["query"], f"select * from t\nLIMIT {MAX_RESULT_ROWS}")
+
+    def test_ignores_other_tools(self):
+        args = {"query": "select * from t"}
+        limit_query_rows(_Tool("redshift_list_orders"), args, None)
+        self.assertEqual(args["query"], "select * from t")
+
+
+if __name__ == "__main__":
+    unittest.main()